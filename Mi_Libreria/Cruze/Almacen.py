@@ -0,0 +1,155 @@
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from ..Principal.Principal import DataProcessor
+from .Cruze import ETAPA_SIN_CRUCE, Indice_Ocurrencia, Proceso, ResultadoCruce, _Bloques
+
+
+def Huellas_Filas(data, columnas=None):
+    """
+    Huella de cada fila (DataProcessor.huella_filas, vista como int64 para
+    SQLite) y su número de ocurrencia entre filas idénticas. Ambas forman la
+    llave estable de la fila entre corridas.
+    """
+    valores = data if columnas is None else data[list(columnas)]
+    huellas = DataProcessor.huella_filas(valores).view(np.int64)
+    ocurrencias, _ = Indice_Ocurrencia(huellas)
+    return huellas, ocurrencias
+
+@dataclass
+class AlmacenCruces:
+    """
+    Pares ya cruzados guardados en SQLite, identificados por la huella de la
+    fila en cada lado. Permite volver a cruzar solo lo nuevo o modificado.
+    """
+
+    ruta: str
+
+    def __post_init__(self):
+        with closing(sqlite3.connect(self.ruta)) as conexion, conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS pares ("
+                "huella_x INTEGER, ocurrencia_x INTEGER, "
+                "huella_y INTEGER, ocurrencia_y INTEGER, etapa INTEGER)"
+            )
+            conexion.execute(
+                "CREATE INDEX IF NOT EXISTS pares_x ON pares (huella_x, ocurrencia_x)"
+            )
+
+    def cargar(self) -> pd.DataFrame:
+        with closing(sqlite3.connect(self.ruta)) as conexion:
+            return pd.read_sql_query(
+                "SELECT huella_x, ocurrencia_x, huella_y, ocurrencia_y, etapa FROM pares", conexion
+            )
+
+    def eliminar(self, llaves_x):
+        """Borra todos los pares de las filas de data1 indicadas por (huella, ocurrencia)."""
+        with closing(sqlite3.connect(self.ruta)) as conexion, conexion:
+            conexion.executemany(
+                "DELETE FROM pares WHERE huella_x = ? AND ocurrencia_x = ?",
+                [(int(h), int(o)) for h, o in llaves_x],
+            )
+
+    def agregar(self, pares: pd.DataFrame):
+        with closing(sqlite3.connect(self.ruta)) as conexion, conexion:
+            conexion.executemany(
+                "INSERT INTO pares VALUES (?, ?, ?, ?, ?)",
+                pares[["huella_x", "ocurrencia_x", "huella_y", "ocurrencia_y", "etapa"]]
+                .astype(np.int64).itertuples(index=False, name=None),
+            )
+
+def _Posiciones(huellas, ocurrencias, huellas_buscadas, ocurrencias_buscadas):
+    # Posición actual de cada llave guardada (-1 si la fila ya no existe)
+    actuales = pd.MultiIndex.from_arrays([huellas, ocurrencias])
+    buscadas = pd.MultiIndex.from_arrays([huellas_buscadas, ocurrencias_buscadas])
+    return actuales.get_indexer(buscadas)
+
+def Proceso_Incremental(data1, data2, Cruze, almacen, Agrupacion="", tolerancia=0,
+                        columnas1=None, columnas2=None, **opciones):
+    """
+    Cruce incremental contra un AlmacenCruces (o la ruta de su SQLite). Los pares
+    guardados cuyas filas siguen iguales en ambos lados se conservan; solo las
+    filas nuevas, modificadas o aún sin cruce pasan por Proceso. Las huellas se
+    calculan con `columnas1` / `columnas2` (por defecto todas las columnas).
+    `opciones` se entregan a Proceso (fecha, ventana_dias, presupuesto, ...).
+
+    Devuelve (ResultadoCruce sobre data1 / data2 completas, invalidados), donde
+    invalidados son los pares guardados que dejaron de valer, con el Id_x / Id_y
+    actual de la fila que aún existe (nulo si ya no está). Toda fila de data1
+    pendiente que Proceso no devuelve (p. ej. de un grupo sin movimientos libres)
+    queda como sin_cruce. Con `estadisticas` devuelve además las estadísticas
+    del cruce de lo pendiente, como Proceso.
+    """
+    if not isinstance(almacen, AlmacenCruces):
+        almacen = AlmacenCruces(almacen)
+    huellas1, ocurrencias1 = Huellas_Filas(data1, columnas1)
+    huellas2, ocurrencias2 = Huellas_Filas(data2, columnas2)
+
+    guardados = almacen.cargar()
+    pos_x = _Posiciones(huellas1, ocurrencias1, guardados["huella_x"].values, guardados["ocurrencia_x"].values)
+    pos_y = _Posiciones(huellas2, ocurrencias2, guardados["huella_y"].values, guardados["ocurrencia_y"].values)
+    # Un registro de data1 cruzado con varios movimientos se invalida completo
+    # si falta cualquiera de ellos
+    faltantes = pd.Series((pos_x < 0) | (pos_y < 0)).groupby(
+        [guardados["huella_x"].values, guardados["ocurrencia_x"].values]
+    ).transform("any").values
+    vigentes = ~faltantes
+    invalidados = guardados[faltantes].assign(
+        Id_x=np.where(pos_x[faltantes] >= 0, pos_x[faltantes] + 1, np.nan),
+        Id_y=np.where(pos_y[faltantes] >= 0, pos_y[faltantes] + 1, np.nan),
+    ).reset_index(drop=True)
+
+    # Solo lo que no quedó cubierto por pares vigentes vuelve a cruzarse
+    libre_x = np.ones(len(data1), dtype=bool)
+    libre_y = np.ones(len(data2), dtype=bool)
+    libre_x[pos_x[vigentes]] = False
+    libre_y[pos_y[vigentes]] = False
+    pendientes_x = np.flatnonzero(libre_x)
+    pendientes_y = np.flatnonzero(libre_y)
+    nuevo = Proceso(data1.iloc[pendientes_x], data2.iloc[pendientes_y], Cruze, Agrupacion,
+                    tolerancia, compacto=True, **opciones)
+    estadisticas = None
+    if opciones.get("estadisticas"):
+        nuevo, estadisticas = nuevo
+    # Proceso solo devuelve los bloques presentes en ambos lados de lo pendiente
+    omitidos = np.setdiff1d(np.arange(len(pendientes_x)), nuevo.pos_x)
+    nuevo_x = pendientes_x[np.concatenate([nuevo.pos_x, omitidos])]
+    nuevo_y = np.concatenate([
+        np.where(nuevo.pos_y >= 0, pendientes_y[np.maximum(nuevo.pos_y, 0)], -1),
+        np.full(len(omitidos), -1, dtype=np.int64),
+    ])
+    nuevo_etapa = np.concatenate([nuevo.etapa, np.full(len(omitidos), ETAPA_SIN_CRUCE, dtype=np.int8)])
+
+    bloques1, _, claves = _Bloques(data1, data2, Agrupacion)
+    todos_x = np.concatenate([pos_x[vigentes], nuevo_x])
+    todos_y = np.concatenate([pos_y[vigentes], nuevo_y])
+    orden = np.argsort(bloques1[todos_x], kind="stable")
+    resultado = ResultadoCruce(
+        pos_x=todos_x[orden],
+        pos_y=todos_y[orden],
+        etapa=np.concatenate([guardados["etapa"].values[vigentes], nuevo_etapa]).astype(np.int8)[orden],
+        grupo=bloques1[todos_x][orden],
+        data1=data1,
+        data2=data2,
+        claves_grupo=claves,
+    )
+
+    if len(invalidados):
+        almacen.eliminar(
+            invalidados[["huella_x", "ocurrencia_x"]].drop_duplicates().itertuples(index=False, name=None)
+        )
+    cruzados = nuevo_y >= 0
+    almacen.agregar(pd.DataFrame({
+        "huella_x": huellas1[nuevo_x[cruzados]],
+        "ocurrencia_x": ocurrencias1[nuevo_x[cruzados]],
+        "huella_y": huellas2[nuevo_y[cruzados]],
+        "ocurrencia_y": ocurrencias2[nuevo_y[cruzados]],
+        "etapa": nuevo_etapa[cruzados],
+    }))
+    if estadisticas is not None:
+        return resultado, invalidados, estadisticas
+    return resultado, invalidados
@@ -0,0 +1,171 @@
+"""
+Benchmark de las etapas de cruce con datos sintéticos de banco contra libro.
+
+Uso:
+    python -m Mi_Libreria.Cruze.Benchmark --tamaños 1000 10000 100000 --salida bench.json
+
+Cada medición registra segundos (mejor de las repeticiones) y memoria pico
+(tracemalloc, en una corrida aparte) por etapa y tamaño, y se emite como JSON
+para comparar entre versiones antes de desplegar.
+"""
+
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .. import _version
+from .Cruze import (Combinacion, Cruce_Exacto, Proceso, Procesador,
+                    Subconjuntos_Suma)
+
+
+def Generar_Banco_Libro(filas, proporcion_divididos=0.05, proporcion_ruido=0.03,
+                        proporcion_repetidos=0.2, ruido_maximo=5, filas_por_rut=40, semilla=0):
+    """
+    Genera un par (libro, banco) con montos en CLP. El libro trae `filas`
+    registros; el banco paga cada uno con un movimiento, salvo una proporción
+    que se paga en 2 a 5 movimientos (pagos divididos). Una parte de los montos
+    se repite (cuotas fijas) y otra trae ruido de hasta `ruido_maximo` pesos.
+    """
+    rng = np.random.default_rng(semilla)
+
+    # Montos log-normales redondeados como se ven en facturas y transferencias
+    montos = np.exp(rng.normal(12.0, 1.5, size=filas))
+    redondeo = rng.choice([1, 10, 100, 1000], size=filas, p=[0.4, 0.2, 0.25, 0.15])
+    montos = np.maximum(np.round(montos / redondeo) * redondeo, 1000).astype(np.int64)
+    frecuentes = montos[rng.integers(0, max(1, filas // 50), size=filas)]
+    repetidos = rng.random(filas) < proporcion_repetidos
+    montos[repetidos] = frecuentes[repetidos]
+
+    # Documentos por proveedor con cola larga (log-normal) pero acotada
+    documentos = np.clip(rng.lognormal(np.log(filas_por_rut), 0.8, size=filas), 1, 10 * filas_por_rut).astype(np.int64)
+    documentos = documentos[:np.searchsorted(np.cumsum(documentos), filas) + 1]
+    ruts = np.asarray([f"{numero}-{numero % 10}" for numero in rng.integers(1_000_000, 30_000_000, size=len(documentos))], dtype=object)
+    rut = rng.permutation(np.repeat(ruts, documentos)[:filas])
+    fecha = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, size=filas), unit="D")
+    libro = pd.DataFrame({"RUT": rut, "FECHA": fecha, "MONTO": montos})
+
+    # Cada registro del libro se paga con 1 movimiento o con 2 a 5 si es dividido
+    partes = np.where(rng.random(filas) < proporcion_divididos, rng.integers(2, 6, size=filas), 1)
+    origen = np.repeat(np.arange(filas), partes)
+    pesos = rng.random(len(origen)) + 0.2
+    suma_pesos = np.bincount(origen, weights=pesos)
+    monto_banco = np.floor(montos[origen] * pesos / suma_pesos[origen]).astype(np.int64)
+    # El último movimiento de cada pago absorbe el redondeo para que la suma cuadre
+    ultimo = np.r_[origen[1:] != origen[:-1], True]
+    monto_banco[ultimo] += montos - np.bincount(origen, weights=monto_banco).astype(np.int64)
+
+    con_ruido = (partes[origen] == 1) & (rng.random(len(origen)) < proporcion_ruido)
+    monto_banco[con_ruido] += rng.integers(-ruido_maximo, ruido_maximo + 1, size=con_ruido.sum())
+    desfase = pd.to_timedelta(rng.integers(0, 4, size=len(origen)), unit="D")
+    banco = pd.DataFrame({
+        "RUT": rut[origen],
+        "FECHA": fecha[origen] + desfase,
+        "MONTO": monto_banco,
+    }).sample(frac=1, random_state=semilla).reset_index(drop=True)
+    return libro, banco
+
+
+def _Medir(funcion, repeticiones=1):
+    # El tiempo se toma sin tracemalloc, que hace varias veces más lenta la
+    # función; la memoria pico sale de una corrida aparte bajo tracemalloc
+    mejor, resultado = None, None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    tracemalloc.start()
+    try:
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return resultado, mejor, pico
+
+
+def _Grupo_Mayor(libro, banco):
+    rut = libro["RUT"].value_counts().index[0]
+    grupo1 = libro[libro["RUT"] == rut].reset_index(drop=True)
+    grupo2 = banco[banco["RUT"] == rut].reset_index(drop=True)
+    return grupo1.assign(Id_x=np.arange(1, len(grupo1) + 1)), grupo2.assign(Id_y=np.arange(1, len(grupo2) + 1))
+
+
+def Ejecutar_Benchmark(tamaños=(1000, 10000, 100000, 1000000), tolerancia=5,
+                       repeticiones=1, semilla=0, filas_combinacion=20):
+    """
+    Mide cada etapa del cruce para cada tamaño y devuelve un dict serializable.
+    Combinacion (búsqueda por fuerza bruta) se mide solo sobre los primeros
+    `filas_combinacion` movimientos sobrantes del grupo más grande.
+    """
+    resultados = []
+    for filas in tamaños:
+        libro, banco = Generar_Banco_Libro(filas, ruido_maximo=tolerancia, semilla=semilla)
+        libro_id = libro.assign(Id_x=np.arange(1, len(libro) + 1))
+        banco_id = banco.assign(Id_y=np.arange(1, len(banco) + 1))
+        grupo1, grupo2 = _Grupo_Mayor(libro, banco)
+        exactos = Cruce_Exacto(grupo1, grupo2, "MONTO")
+        sobrantes1 = grupo1[~grupo1["Id_x"].isin(exactos["Id_x"])]
+        sobrantes2 = grupo2[~grupo2["Id_y"].isin(exactos["Id_y"])]
+
+        etapas = {
+            "Cruce_Exacto": lambda: Cruce_Exacto(libro_id, banco_id, "MONTO"),
+            "Subconjuntos_Suma": lambda: [
+                Subconjuntos_Suma(sobrantes1["MONTO"].values, sobrantes2["MONTO"].values, tamaño, tolerancia)
+                for tamaño in range(2, 6)
+            ],
+            "Combinacion": lambda: Combinacion(sobrantes2.head(filas_combinacion), 3, "MONTO"),
+            "Procesador": lambda: Procesador(grupo1, grupo2, "MONTO", tolerancia),
+            "Proceso": lambda: Proceso(libro, banco, "MONTO", "RUT", tolerancia, compacto=True),
+        }
+        for etapa, funcion in etapas.items():
+            resultado, segundos, pico = _Medir(funcion, repeticiones)
+            medicion = {
+                "etapa": etapa,
+                "filas": filas,
+                "filas_banco": len(banco),
+                "segundos": round(segundos, 6),
+                "memoria_pico_mb": round(pico / 2**20, 3),
+            }
+            if etapa == "Proceso":
+                cruzados = int((resultado.pos_y >= 0).sum())
+                medicion["pares"] = cruzados
+                medicion["filas_por_segundo"] = round((len(libro) + len(banco)) / segundos, 1)
+            resultados.append(medicion)
+
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "version": _version.__version__,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "tolerancia": tolerancia,
+        "resultados": resultados,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de cruces banco/libro")
+    parser.add_argument("--tamaños", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--tolerancia", type=float, default=5)
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto se imprime)")
+    args = parser.parse_args(argv)
+
+    informe = Ejecutar_Benchmark(args.tamaños, args.tolerancia, args.repeticiones, args.semilla)
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,1238 @@
 import pandas as pd
 import numpy as np
 import itertools
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from decimal import ROUND_HALF_UP, Decimal
+from math import comb
+from typing import Any, Dict, List, Optional, Union
 
 
+def Indice_Ocurrencia(valores, bloques=None):
+    """
+    Numera cada monto según su ocurrencia (1 para la primera aparición, 2 para la
+    segunda, ...). Con `bloques` la numeración parte de nuevo en cada bloque.
+    Devuelve la llave compuesta como dos arreglos: (rango, monto).
+    """
+    montos = np.asarray(valores)
+    rango = np.empty(len(montos), dtype=np.int64)
+    if len(montos) == 0:
+        return rango, montos
+    codigos, unicos = pd.factorize(montos)
+    if bloques is not None:
+        codigos = codigos.astype(np.int64) + np.asarray(bloques, dtype=np.int64) * (len(unicos) + 1)
+    orden = np.argsort(codigos, kind="stable")
+    ordenados = codigos[orden]
+    posicion = np.arange(len(montos), dtype=np.int64)
+    inicio = np.concatenate([[True], ordenados[1:] != ordenados[:-1]])
+    primero = np.maximum.accumulate(np.where(inicio, posicion, 0))
+    rango[orden] = posicion - primero + 1
+    return rango, montos
+
 def lista_Indice(lista_original):
-    lista_con_Indice = []
-    volatil = []
-    for elemento in lista_original:
-        volatil.append(elemento)
-        nuevo_indice = volatil.count(elemento)*100000 + elemento
-        lista_con_Indice.append(nuevo_indice)
-    return lista_con_Indice
-
-def Combinacion(df_base, grupo, Cruze):
-    combi = list(itertools.combinations(df_base["Id_y"].astype(str).values, grupo))
-    combi2 = ["-".join(tupla) for tupla in combi]
-    combi3 = pd.DataFrame([[x] + x.split("-") for x in combi2])
-    combi4 = pd.melt(combi3, id_vars=[0], var_name="Atributo", value_name="Id_y")
-    combi4["Id_y"] = combi4["Id_y"].astype(int)
-    df_merge = pd.merge(combi4[[0, "Id_y"]], df_base, on="Id_y", how="left")
-    df_resumen = df_merge.groupby(0)[Cruze].agg(["sum"]).reset_index()
-    df_resumen["sum_1"] = lista_Indice(df_resumen["sum"].values)
-    df_final = pd.merge(df_merge, df_resumen, on=0, how="left")
+    # Formato histórico rango*100000 + monto; colisiona con montos >= 100000,
+    # para cruzar se usa Indice_Ocurrencia
+    rango, montos = Indice_Ocurrencia(lista_original)
+    return list(rango * 100000 + montos)
+
+@dataclass
+class Presupuesto:
+    """
+    Límites de la búsqueda combinatoria por grupo. Al agotarse se conserva lo
+    encontrado hasta ese momento y las filas restantes quedan sin resolver.
+    `max_memoria` (bytes) acota las combinaciones que Combinacion materializa y
+    las tablas de la búsqueda de subconjuntos (etapa combinatoria de Proceso);
+    las etapas exacta, de tolerancia y de texto no lo usan.
+    Por omisión se evalúan a lo más 10 millones de candidatos por grupo; con
+    max_candidatos=None la búsqueda no tiene tope.
+    """
+
+    max_candidatos: Optional[int] = 10_000_000
+    max_segundos: Optional[float] = None
+    max_memoria: Optional[int] = None
+    candidatos: int = field(default=0, init=False)
+    memoria: int = field(default=0, init=False)
+    inicio: float = field(default=0.0, init=False)
+    agotado: bool = field(default=False, init=False)
+
+    def iniciar(self) -> 'Presupuesto':
+        """Copia con los contadores en cero, para usar en un grupo."""
+        nuevo = replace(self)
+        nuevo.inicio = time.perf_counter()
+        return nuevo
+
+    def consumir(self, candidatos: int = 1, memoria: int = 0) -> bool:
+        """Descuenta del presupuesto; devuelve False cuando ya se agotó."""
+        self.candidatos += candidatos
+        self.memoria += memoria
+        if self.max_candidatos is not None and self.candidatos > self.max_candidatos:
+            self.agotado = True
+        elif self.max_memoria is not None and self.memoria > self.max_memoria:
+            self.agotado = True
+        elif self.max_segundos is not None and time.perf_counter() - self.inicio > self.max_segundos:
+            self.agotado = True
+        return not self.agotado
+
+# Pasos de la búsqueda con poda antes de pasar a meet-in-the-middle
+_PASOS_PODA = 2000
+
+def Combinaciones_Por_Lotes(n, tamaño, lote=100000):
+    """Genera las combinaciones de los índices 0..n-1 como arreglos (lote, tamaño)."""
+    iterador = itertools.combinations(range(n), tamaño)
+    while True:
+        bloque = np.fromiter(
+            itertools.chain.from_iterable(itertools.islice(iterador, lote)), dtype=np.int64
+        )
+        if len(bloque) == 0:
+            return
+        yield bloque.reshape(-1, tamaño)
+
+def Combinacion(df_base, grupo, Cruze, presupuesto=None):
+    # La columna 0 numera cada combinación; hay una fila por integrante (Id_y).
+    # Cada lote se arma por separado y su memoria se descuenta del presupuesto;
+    # al agotarse se devuelven solo los lotes ya armados
+    presupuesto = presupuesto.iniciar() if presupuesto is not None else None
+    lote = 100000
+    if presupuesto is not None and presupuesto.max_memoria and len(df_base):
+        # Lotes de tamaño acorde a la memoria por fila (más la columna 0)
+        por_fila = df_base.memory_usage(deep=True, index=False).sum() / len(df_base) + 8
+        lote = max(1, min(lote, int(presupuesto.max_memoria // (2 * por_fila * grupo))))
+    partes, sumas, numero = [], [], 0
+    for indices in Combinaciones_Por_Lotes(len(df_base), grupo, lote):
+        combi = pd.DataFrame({
+            0: np.repeat(np.arange(numero, numero + len(indices)), grupo),
+            "Id_y": df_base["Id_y"].values[indices.ravel()],
+        })
+        parte = pd.merge(combi, df_base, on="Id_y", how="left")
+        if presupuesto is not None and not presupuesto.consumir(
+            len(indices), int(parte.memory_usage(deep=True).sum())
+        ):
+            break
+        partes.append(parte)
+        sumas.append(df_base[Cruze].values[indices].sum(axis=1))
+        numero += len(indices)
+    if not partes:
+        partes.append(pd.merge(pd.DataFrame({0: np.empty(0, dtype=np.int64), "Id_y": df_base["Id_y"].values[:0]}),
+                               df_base, on="Id_y", how="left"))
+    df_final = pd.concat(partes, ignore_index=True)
+    suma = np.concatenate(sumas) if sumas else df_base[Cruze].values[:0]
+    # La llave de cada suma es el par (Rango, sum); rango*100000 + suma colisionaba
+    rango, _ = Indice_Ocurrencia(suma)
+    df_final["sum"] = np.repeat(suma, grupo)
+    df_final["Rango"] = np.repeat(rango, grupo)
     return df_final
 
-def Procesador(data1, data2, Cruze, tolerancia):
-    data1 = data1.copy()
-    data2 = data2.copy()
-    data1.loc[:, f"{Cruze}_Indice"] = lista_Indice(data1[Cruze])
-    data2.loc[:, f"{Cruze}_Indice"] = lista_Indice(data2[Cruze])
-    data1.loc[:, f"{Cruze}_Indice"] = data1[f"{Cruze}_Indice"].astype(float)
-    data2.loc[:, f"{Cruze}_Indice"] = data2[f"{Cruze}_Indice"].astype(float)
-    data1 = data1.sort_values(by=f"{Cruze}_Indice").copy()
-    data2 = data2.sort_values(by=f"{Cruze}_Indice").copy()
-    
-    Resultado = pd.merge_asof(
-        data1, 
-        data2, 
-        on=f"{Cruze}_Indice", 
-        direction="nearest", 
-        tolerance=tolerancia
+def _Combinaciones_Por_Nivel(valores, tamaño):
+    # Combinaciones de 0..tamaño posiciones de `valores`, nivel por nivel y sin
+    # recorrerlas en Python: cada fila se extiende con cada posición posterior a
+    # su última. Devuelve [(índices (filas, c) int32, sumas)] para c = 0..tamaño
+    indices = np.empty((1, 0), dtype=np.int32)
+    sumas = np.zeros(1, dtype=valores.dtype)
+    ultimo = np.full(1, -1, dtype=np.int64)
+    niveles = [(indices, sumas)]
+    for c in range(1, tamaño + 1):
+        cuenta = len(valores) - 1 - ultimo
+        filas = np.repeat(np.arange(len(ultimo)), cuenta)
+        ultimo = np.arange(len(filas)) - np.repeat(np.cumsum(cuenta) - cuenta, cuenta) + ultimo[filas] + 1
+        siguientes = np.empty((len(filas), c), dtype=np.int32)
+        siguientes[:, :-1] = indices[filas]
+        siguientes[:, -1] = ultimo
+        indices = siguientes
+        sumas = sumas[filas] + valores[ultimo]
+        niveles.append((indices, sumas))
+    return niveles
+
+def _Indice_Invertido(indices, n):
+    # Filas de `indices` que contienen cada posición p: filas[inicio[p]:inicio[p + 1]].
+    # Con pocas posiciones se ordena como uint16, que numpy ordena por radix
+    posiciones = indices.ravel()
+    if n <= np.iinfo(np.uint16).max:
+        posiciones = posiciones.astype(np.uint16)
+    filas = np.argsort(posiciones, kind="stable") // max(indices.shape[1], 1)
+    inicio = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(posiciones, minlength=n), out=inicio[1:])
+    return filas, inicio
+
+def _Tablas_Subconjunto(valores, tamaño, presupuesto, usado=None):
+    # Meet-in-the-middle: los valores se parten en dos mitades y un subconjunto
+    # de `tamaño` es a de la primera más tamaño-a de la segunda. Por cada
+    # reparto se guarda la mitad con menos combinaciones para recorrer y la
+    # otra ordenada por suma para buscar, cada una con su máscara de filas
+    # libres (ver _Marcar_Usados). El costo se descuenta del presupuesto antes
+    # de construir; si no alcanza (o se acaba el tiempo) devuelve None
+    mitades = ((0, len(valores) // 2), (len(valores) // 2, len(valores)))
+    maximos = [min(tamaño, fin - desde) for desde, fin in mitades]
+    filas = memoria = 0
+    for (desde, fin), tope in zip(mitades, maximos):
+        for c in range(tope + 1):
+            filas += comb(fin - desde, c)
+            memoria += comb(fin - desde, c) * (4 * c + valores.itemsize)
+    # Índices invertidos y máscaras de cada tabla
+    memoria += sum(comb(mitades[0][1], a) * (1 + 8 * a) + comb(len(valores) - mitades[0][1], tamaño - a)
+                   * (1 + 8 * (tamaño - a)) for a in range(tamaño - maximos[1], maximos[0] + 1))
+    if not presupuesto.consumir(filas, memoria):
+        return None
+    niveles = [_Combinaciones_Por_Nivel(valores[desde:fin], tope) for (desde, fin), tope in zip(mitades, maximos)]
+    usado = np.zeros(len(valores), dtype=bool) if usado is None else usado
+    tablas = []
+    for a in range(tamaño - maximos[1], maximos[0] + 1):
+        if not presupuesto.consumir(0):
+            return None
+        recorrer = niveles[0][a]
+        buscar = (niveles[1][tamaño - a][0] + mitades[1][0], niveles[1][tamaño - a][1])
+        if len(recorrer[1]) > len(buscar[1]):
+            recorrer, buscar = buscar, recorrer
+        orden = np.argsort(buscar[1])
+        indices_orden = buscar[0][orden]
+        tablas.append({"indices": recorrer[0], "sumas": recorrer[1],
+                       "indices_orden": indices_orden, "sumas_orden": buscar[1][orden],
+                       "libres": ~usado[recorrer[0]].any(axis=1),
+                       "libres_orden": ~usado[indices_orden].any(axis=1), "posiciones": len(valores)})
+    return tablas
+
+def _Marcar_Usados(tablas, posiciones):
+    # Apaga solo las filas de las tablas que contienen las posiciones recién
+    # usadas, sin volver a recorrer las tablas completas. El índice invertido
+    # posición -> filas de cada tabla se arma la primera vez que se necesita
+    for tabla in tablas:
+        for libres, indices in (("libres", "indices"), ("libres_orden", "indices_orden")):
+            if f"invertido_{indices}" not in tabla:
+                tabla[f"invertido_{indices}"] = _Indice_Invertido(tabla[indices], tabla["posiciones"])
+            filas, inicio = tabla[f"invertido_{indices}"]
+            for posicion in posiciones:
+                tabla[libres][filas[inicio[posicion]:inicio[posicion + 1]]] = False
+
+def _Buscar_En_Tablas(tablas, objetivo, tolerancia, presupuesto, lote=1 << 20):
+    # Primer subconjunto de filas libres cuya suma cae en objetivo ± tolerancia
+    for tabla in tablas:
+        filas = np.flatnonzero(tabla["libres"])
+        if len(filas) == 0:
+            continue
+        if not presupuesto.consumir(len(filas)):
+            return None
+        sumas = tabla["sumas"][filas]
+        desde = np.searchsorted(tabla["sumas_orden"], objetivo - tolerancia - sumas, side="left")
+        hasta = np.searchsorted(tabla["sumas_orden"], objetivo + tolerancia - sumas, side="right")
+        encontrados = np.flatnonzero(desde < hasta)
+        # Los rangos de suma se expanden por lotes de hasta `lote` filas para
+        # ver cuáles siguen libres
+        acumulado = np.cumsum(hasta[encontrados] - desde[encontrados])
+        inicio = 0
+        while inicio < len(encontrados):
+            base = acumulado[inicio - 1] if inicio else 0
+            corte = max(int(np.searchsorted(acumulado, base + lote, side="right")), inicio + 1)
+            parte = encontrados[inicio:corte]
+            cuenta = hasta[parte] - desde[parte]
+            if not presupuesto.consumir(int(cuenta.sum())):
+                return None
+            posiciones = (np.arange(cuenta.sum()) - np.repeat(np.cumsum(cuenta) - cuenta, cuenta)
+                          + np.repeat(desde[parte], cuenta))
+            libres = np.flatnonzero(tabla["libres_orden"][posiciones])
+            if len(libres):
+                fila = parte[np.searchsorted(np.cumsum(cuenta), libres[0], side="right")]
+                return np.sort(np.r_[tabla["indices"][filas[fila]], tabla["indices_orden"][posiciones[libres[0]]]])
+            inicio = corte
+    return None
+
+def _Buscar_Acotado(valores, tamaño, objetivo, tolerancia, limite=_PASOS_PODA):
+    # Búsqueda en profundidad con poda sobre `valores` ordenado de menor a
+    # mayor (las cotas de la suma posible con los restantes descartan ramas
+    # completas). Se corta tras `limite` pasos. Devuelve (elegidos o None,
+    # pasos, concluyente): si no es concluyente hay que buscar con las tablas
+    n = len(valores)
+    prefijo = [0]
+    for valor in valores:
+        prefijo.append(prefijo[-1] + valor)
+    limite_inf = objetivo - tolerancia
+    limite_sup = objetivo + tolerancia
+    elegidos = []
+    pasos = [0]
+
+    def buscar(inicio, restantes, suma):
+        if restantes == 0:
+            return limite_inf <= suma <= limite_sup
+        mayores = prefijo[n] - prefijo[n - restantes + 1]
+        for j in range(inicio, n - restantes + 1):
+            pasos[0] += 1
+            if pasos[0] > limite:
+                return False
+            if j > inicio and valores[j] == valores[j - 1]:
+                continue
+            minimo = suma + prefijo[j + restantes] - prefijo[j]
+            if minimo > limite_sup:
+                break
+            if suma + valores[j] + mayores < limite_inf:
+                continue
+            elegidos.append(j)
+            if buscar(j + 1, restantes - 1, suma + valores[j]):
+                return True
+            elegidos.pop()
+        return False
+
+    if buscar(0, tamaño, 0):
+        return list(elegidos), pasos[0], True
+    return None, pasos[0], pasos[0] <= limite
+
+def _Buscar_Subconjunto(valores, tamaño, objetivo, tolerancia, presupuesto=None):
+    # Un subconjunto de `tamaño` posiciones de `valores` (ordenado de menor a
+    # mayor) que sume objetivo ± tolerancia, o None
+    if tamaño < 1 or tamaño > len(valores):
+        return None
+    presupuesto = presupuesto if presupuesto is not None else Presupuesto().iniciar()
+    elegidos, pasos, concluyente = _Buscar_Acotado(valores, tamaño, objetivo, tolerancia)
+    if not presupuesto.consumir(pasos) or concluyente:
+        return elegidos
+    tablas = _Tablas_Subconjunto(np.asarray(valores), tamaño, presupuesto)
+    if tablas is None:
+        return None
+    elegidos = _Buscar_En_Tablas(tablas, objetivo, tolerancia, presupuesto)
+    return None if elegidos is None else elegidos.tolist()
+
+def _Subconjuntos_En_Ventana(objetivos, candidatos, tamaño, tolerancia, presupuesto, fechas, ventana,
+                            fechas_objetivos=None):
+    # Los candidatos se ordenan por fecha; cada subconjunto se ancla en su
+    # integrante más antiguo y el resto se busca solo entre los libres que caen
+    # dentro de los `ventana` días siguientes. Con `fechas_objetivos` además
+    # todos deben caer a lo más a `ventana` días de la fecha del objetivo
+    validos = np.argsort(fechas, kind="stable")
+    validos = validos[~np.isnan(fechas[validos])]
+    dias = fechas[validos]
+    valores = candidatos[validos]
+    fin = np.searchsorted(dias, dias + ventana, side="right")
+    libre = np.ones(len(validos), dtype=bool)
+    posiciones = np.arange(len(validos))
+    anclas = None
+    asignaciones = []
+    for i in np.argsort(objetivos, kind="stable"):
+        if libre.sum() < tamaño or presupuesto.agotado:
+            break
+        if anclas is None:
+            # Solo sirven de ancla las filas libres con suficientes libres en su
+            # ventana; se recalcula únicamente cuando cambia lo libre
+            acumulado = np.r_[0, np.cumsum(libre)]
+            anclas = np.flatnonzero(libre & (acumulado[fin] - acumulado[posiciones + 1] >= tamaño - 1))
+        objetivo = objetivos[i].item()
+        desde, hasta = 0, len(validos)
+        if fechas_objetivos is not None:
+            if np.isnan(fechas_objetivos[i]):
+                continue
+            desde = np.searchsorted(dias, fechas_objetivos[i] - ventana, side="left")
+            hasta = np.searchsorted(dias, fechas_objetivos[i] + ventana, side="right")
+        for ancla in anclas[(anclas >= desde) & (anclas < hasta)]:
+            vecinos = np.flatnonzero(libre[ancla + 1:min(fin[ancla], hasta)]) + ancla + 1
+            if len(vecinos) < tamaño - 1:
+                continue
+            if not presupuesto.consumir():
+                break
+            vecinos = vecinos[np.argsort(valores[vecinos], kind="stable")]
+            elegidos = _Buscar_Subconjunto(
+                valores[vecinos].tolist(), tamaño - 1, objetivo - valores[ancla].item(), tolerancia, presupuesto
+            )
+            if elegidos is None:
+                continue
+            miembros = np.r_[ancla, vecinos[elegidos]]
+            libre[miembros] = False
+            anclas = None
+            asignaciones.append((int(i), validos[miembros].tolist()))
+            break
+    return asignaciones
+
+def Subconjuntos_Suma(objetivos, candidatos, tamaño, tolerancia=0, presupuesto=None,
+                      fechas=None, ventana=None, fechas_objetivos=None):
+    """
+    Asigna a cada monto objetivo un subconjunto disjunto de `tamaño` candidatos
+    cuya suma coincide dentro de la tolerancia. Devuelve pares (posición objetivo,
+    posiciones de candidatos) sobre los arreglos recibidos. Sin presupuesto se
+    usan los límites de Presupuesto(); si se agota devuelve lo encontrado hasta
+    ese momento. Con `fechas` (días) y `ventana` solo se consideran subconjuntos
+    cuyos integrantes caen dentro de esa ventana, y con `fechas_objetivos`
+    además a lo más a `ventana` días de su objetivo.
+    """
+    objetivos = np.asarray(objetivos)
+    candidatos = np.asarray(candidatos)
+    presupuesto = presupuesto if presupuesto is not None else Presupuesto().iniciar()
+    if fechas is not None and ventana is not None:
+        return _Subconjuntos_En_Ventana(
+            objetivos, candidatos, tamaño, tolerancia, presupuesto, np.asarray(fechas, dtype=float), ventana,
+            None if fechas_objetivos is None else np.asarray(fechas_objetivos, dtype=float)
+        )
+    # Cada objetivo se busca primero con la poda en profundidad, que resuelve
+    # rápido los casos comunes; si no concluye se construyen (una vez) las
+    # tablas meet-in-the-middle, cuyo costo queda acotado por el presupuesto
+    orden = np.argsort(candidatos, kind="stable")
+    usado = np.zeros(len(candidatos), dtype=bool)
+    tablas = None
+    asignaciones = []
+    for i in np.argsort(objetivos, kind="stable"):
+        if len(usado) - usado.sum() < tamaño or presupuesto.agotado:
+            break
+        libres = orden[~usado[orden]]
+        objetivo = objetivos[i].item()
+        elegidos, pasos, concluyente = _Buscar_Acotado(candidatos[libres].tolist(), tamaño, objetivo, tolerancia)
+        if not presupuesto.consumir(pasos):
+            break
+        if concluyente:
+            elegidos = None if elegidos is None else libres[elegidos]
+        else:
+            if tablas is None:
+                tablas = _Tablas_Subconjunto(candidatos, tamaño, presupuesto, usado)
+            if tablas is None:
+                break
+            elegidos = _Buscar_En_Tablas(tablas, objetivo, tolerancia, presupuesto)
+        if elegidos is None:
+            continue
+        usado[elegidos] = True
+        if tablas is not None:
+            _Marcar_Usados(tablas, elegidos)
+        asignaciones.append((int(i), np.sort(elegidos).tolist()))
+    return asignaciones
+
+def Montos_Enteros(valores, decimales=2):
+    """
+    Lleva montos a unidades mínimas en int64 (con decimales=2, pesos a
+    centavos), redondeando la mitad lejos de cero. Acepta números, Decimal o
+    texto numérico; un monto nulo es un error.
+    """
+    serie = pd.Series(valores)
+    if serie.isna().any():
+        raise ValueError("Montos nulos: no se pueden llevar a unidades enteras")
+    escala = 10 ** decimales
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return serie.values.astype(np.int64) * escala
+    if pd.api.types.is_float_dtype(serie.dtype):
+        # Se redondea primero a los decimales pedidos para absorber el ruido binario
+        escalados = np.round(serie.values.astype(np.float64) * escala, 6)
+        return (np.sign(escalados) * np.floor(np.abs(escalados) + 0.5)).astype(np.int64)
+    unidad = Decimal(1)
+    return np.fromiter(
+        (int((Decimal(str(valor)) * escala).quantize(unidad, rounding=ROUND_HALF_UP)) for valor in serie),
+        dtype=np.int64, count=len(serie)
     )
 
-    for y in range(2, 10):
-        mask_no_clasif = ~data2["Id_y"].isin(Resultado["Id_y"].values)
-        Sin_Clasificar = data2[mask_no_clasif]
-        x = y if y != 4 else Sin_Clasificar.shape[0]
-        if Sin_Clasificar.shape[0] >= x and x >= 2:
-            Resultado_comb = Combinacion(Sin_Clasificar, x, Cruze)
-            Resultado_comb = Resultado_comb.rename(
-                columns={f"{Cruze}_Indice": "Eliminar1", "sum_1": f"{Cruze}_Indice"}
+def _Arreglo_Montos(serie):
+    # Los tipos con nulos de pandas (Int64, Float64) pasan a numpy: enteros sin
+    # nulos a int64 y el resto a float64 con NaN
+    if not pd.api.types.is_extension_array_dtype(serie.dtype):
+        return serie.values
+    if pd.api.types.is_integer_dtype(serie.dtype) and not serie.hasnans:
+        return serie.to_numpy(dtype=np.int64)
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    return serie.to_numpy()
+
+def _Montos_Enteros_Sin_Nulos(serie, decimales):
+    # Montos_Enteros sobre las posiciones no nulas; las nulas quedan en 0
+    nulos = serie.isna().values
+    if not nulos.any():
+        return Montos_Enteros(serie, decimales)
+    montos = np.zeros(len(serie), dtype=np.int64)
+    montos[~nulos] = Montos_Enteros(serie[~nulos], decimales)
+    return montos
+
+def _Montos_Comparables(serie1, serie2, decimales=None):
+    # Con `decimales` ambos lados pasan a unidades mínimas int64 (los nulos
+    # quedan en 0: quien cruza debe excluirlos con serie.isna()). Si no, los
+    # montos enteros (aunque vengan como float) se comparan como int64 y si algún
+    # lado trae decimales ambos se comparan como float64
+    if decimales is not None:
+        return tuple(_Montos_Enteros_Sin_Nulos(serie, decimales) for serie in (serie1, serie2))
+    valores1, valores2 = _Arreglo_Montos(serie1), _Arreglo_Montos(serie2)
+    if all(
+        pd.api.types.is_integer_dtype(v.dtype)
+        or (pd.api.types.is_float_dtype(v.dtype) and np.isfinite(v).all() and (v % 1 == 0).all())
+        for v in (valores1, valores2)
+    ):
+        return valores1.astype(np.int64), valores2.astype(np.int64)
+    return valores1.astype(np.float64), valores2.astype(np.float64)
+
+# Los códigos se guardan (AlmacenCruces): etapas nuevas van al final
+ETAPAS = ("exacta", "tolerancia", "combinacion", "sin_cruce", "sin_resolver", "texto")
+(ETAPA_EXACTA, ETAPA_TOLERANCIA, ETAPA_COMBINACION,
+ ETAPA_SIN_CRUCE, ETAPA_SIN_RESOLVER, ETAPA_TEXTO) = range(len(ETAPAS))
+
+@dataclass
+class ConfiguracionCruce:
+    """Parámetros del cruce que viajan a cada grupo (también entre procesos)."""
+
+    Cruze: str
+    tolerancia: float = 0
+    presupuesto: Optional[Presupuesto] = None
+    medir: bool = False
+    fecha: Optional[str] = None
+    ventana_dias: Optional[float] = None
+    tamaño_maximo: int = 9
+    texto: Optional[tuple] = None
+    umbral_texto: float = 0.3
+    decimales: Optional[int] = None
+
+    def __post_init__(self):
+        if isinstance(self.texto, str):
+            self.texto = (self.texto, self.texto)
+
+    def columnas(self, lado: int) -> List[str]:
+        """Columnas que usan las etapas en data1 (lado 0) o data2 (lado 1)."""
+        columnas = [self.Cruze]
+        if self.fecha is not None:
+            columnas.append(self.fecha)
+        if self.texto is not None and self.texto[lado] not in columnas:
+            columnas.append(self.texto[lado])
+        return columnas
+
+@dataclass
+class EstadisticasCruce:
+    """
+    Mediciones de un cruce por etapa: segundos, filas pendientes de cada lado
+    antes y después, pares encontrados, candidatos evaluados en la búsqueda
+    combinatoria y, con `memoria=True`, el pico de memoria (tracemalloc). Solo la
+    etapa combinatoria, que recorre los grupos uno a uno, lleva la clave de
+    `grupo`; las demás cruzan todos los grupos a la vez y la dejan vacía.
+    """
+
+    memoria: bool = False
+    registros: List[Dict[str, Any]] = field(default_factory=list)
+
+    def agregar(self, registros, grupo=None):
+        for registro in registros:
+            self.registros.append(dict(registro) if grupo is None else dict(registro, grupo=grupo))
+
+    def tabla(self) -> pd.DataFrame:
+        columnas = ["grupo", "etapa", "tamaño", "segundos", "filas_x_entrada", "filas_y_entrada",
+                    "filas_x_salida", "filas_y_salida", "pares", "candidatos", "memoria_pico_mb"]
+        return pd.DataFrame(self.registros, columns=columnas)
+
+    def resumen(self) -> pd.DataFrame:
+        """Totales por etapa (y tamaño de combinación)."""
+        tabla = self.tabla().fillna({"tamaño": 0})
+        return tabla.groupby(["etapa", "tamaño"], sort=False).agg(
+            mediciones=("etapa", "size"), segundos=("segundos", "sum"), pares=("pares", "sum"),
+            candidatos=("candidatos", "sum"), memoria_pico_mb=("memoria_pico_mb", "max"),
+        ).reset_index()
+
+    def a_json(self, ruta: Optional[str] = None) -> str:
+        texto = self.tabla().to_json(orient="records", force_ascii=False, default_handler=str)
+        if ruta:
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(texto)
+        return texto
+
+def _Iniciar_Medicion():
+    if tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    return time.perf_counter()
+
+def _Registrar_Etapa(registros, etapa, inicio, entrada, estado=None, **datos):
+    segundos = time.perf_counter() - inicio
+    registro = {
+        "etapa": etapa,
+        "segundos": segundos,
+        "filas_x_entrada": entrada[0],
+        "filas_y_entrada": entrada[1],
+    }
+    if estado is not None:
+        registro["filas_x_salida"] = int(estado.libre_x.sum())
+        registro["filas_y_salida"] = int(estado.libre_y.sum())
+    if tracemalloc.is_tracing():
+        registro["memoria_pico_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    registro.update(datos)
+    registros.append(registro)
+
+def _Columnas(Agrupacion):
+    if Agrupacion is None or (isinstance(Agrupacion, str) and not Agrupacion):
+        return []
+    if isinstance(Agrupacion, (list, tuple)):
+        return list(Agrupacion)
+    return [Agrupacion]
+
+def _Bloques(data1, data2, Agrupacion):
+    # Las claves exactas de ambos lados se numeran juntas en bloques int64 (en
+    # el orden de las claves); filas con alguna clave nula quedan en -1
+    columnas = _Columnas(Agrupacion)
+    if not columnas:
+        return np.zeros(len(data1), dtype=np.int64), np.zeros(len(data2), dtype=np.int64), [None]
+    claves = pd.concat([data1[columnas], data2[columnas]], ignore_index=True)
+    grupos = claves.groupby(columnas, sort=True)
+    bloques = grupos.ngroup().fillna(-1).values.astype(np.int64)
+    return bloques[:len(data1)], bloques[len(data1):], list(grupos.size().index)
+
+def _Dias(serie):
+    # Fechas como días (float) desde 1970; las nulas quedan NaN y no caen en ninguna ventana
+    fechas = pd.to_datetime(serie)
+    return ((fechas - pd.Timestamp(0)).dt.total_seconds() / 86400).values
+
+@dataclass
+class EstadoCruce:
+    """Lleva qué filas de cada lado siguen libres y los pares encontrados por etapa."""
+
+    id_x: np.ndarray
+    id_y: np.ndarray
+    bloque_x: np.ndarray = None
+    libre_x: np.ndarray = None
+    libre_y: np.ndarray = None
+    sin_resolver: np.ndarray = None
+    pares_x: List[np.ndarray] = field(default_factory=list)
+    pares_y: List[np.ndarray] = field(default_factory=list)
+    etapas: List[np.ndarray] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.bloque_x is None:
+            self.bloque_x = np.zeros(len(self.id_x), dtype=np.int64)
+        if self.libre_x is None:
+            self.libre_x = np.ones(len(self.id_x), dtype=bool)
+        if self.libre_y is None:
+            self.libre_y = np.ones(len(self.id_y), dtype=bool)
+        if self.sin_resolver is None:
+            self.sin_resolver = np.zeros(len(self.id_x), dtype=bool)
+
+    @classmethod
+    def desde_tablas(cls, data1, data2) -> 'EstadoCruce':
+        bloque_x = data1["_Bloque"].values if "_Bloque" in data1 else None
+        return cls(id_x=data1["Id_x"].values, id_y=data2["Id_y"].values, bloque_x=bloque_x)
+
+    def pendientes(self):
+        """Posiciones de las filas aún sin cruzar en data1 y data2."""
+        return np.flatnonzero(self.libre_x), np.flatnonzero(self.libre_y)
+
+    def marcar(self, pos_x, pos_y, etapa):
+        """Registra pares por posición y los saca de las máscaras de pendientes."""
+        pos_x = np.asarray(pos_x, dtype=np.int64)
+        pos_y = np.asarray(pos_y, dtype=np.int64)
+        if len(pos_x) == 0:
+            return
+        self.libre_x[pos_x] = False
+        self.libre_y[pos_y] = False
+        self.pares_x.append(pos_x)
+        self.pares_y.append(pos_y)
+        self.etapas.append(np.full(len(pos_x), etapa, dtype=np.int8))
+
+    def tabla(self) -> pd.DataFrame:
+        """
+        Pares Id_x / Id_y encontrados más las filas de data1 sin cruzar (Id_y nulo),
+        ordenados por bloque (Grupo) y dentro de cada bloque por etapa.
+        """
+        pos_x = np.concatenate(self.pares_x) if self.pares_x else np.empty(0, dtype=np.int64)
+        pos_y = np.concatenate(self.pares_y) if self.pares_y else np.empty(0, dtype=np.int64)
+        etapas = np.concatenate(self.etapas) if self.etapas else np.empty(0, dtype=np.int8)
+        sin_cruzar = np.flatnonzero(self.libre_x)
+        etapa_libre = np.where(self.sin_resolver[sin_cruzar], ETAPA_SIN_RESOLVER, ETAPA_SIN_CRUCE)
+        filas_x = np.concatenate([pos_x, sin_cruzar])
+        orden = np.argsort(self.bloque_x[filas_x], kind="stable")
+        return pd.DataFrame({
+            "Id_x": self.id_x[filas_x][orden],
+            "Id_y": np.concatenate([self.id_y[pos_y].astype(float), np.full(len(sin_cruzar), np.nan)])[orden],
+            "Etapa": np.concatenate([etapas, etapa_libre.astype(np.int8)])[orden],
+            "Grupo": self.bloque_x[filas_x][orden],
+        })
+
+def _Emparejar(pos_x, pos_y, costo):
+    # Asignación uno a uno codiciosa por menor costo: un solo recorrido de los
+    # candidatos ordenados que acepta cada uno cuyas filas x e y siguen libres
+    orden = np.argsort(costo, kind="stable")
+    usado_x = bytearray(int(pos_x.max(initial=-1)) + 1)
+    usado_y = bytearray(int(pos_y.max(initial=-1)) + 1)
+    elegidos = []
+    for candidato, x, y in zip(orden.tolist(), pos_x[orden].tolist(), pos_y[orden].tolist()):
+        if usado_x[x] or usado_y[y]:
+            continue
+        usado_x[x] = usado_y[y] = 1
+        elegidos.append(candidato)
+    elegidos = np.asarray(elegidos, dtype=np.int64)
+    return pos_x[elegidos].astype(np.int64), pos_y[elegidos].astype(np.int64)
+
+def _Sin_Bloques(montos, bloques):
+    return np.zeros(len(montos), dtype=np.int64) if bloques is None else bloques
+
+def _Pares_Exactos(montos1, montos2, bloques1=None, bloques2=None):
+    bloques1, bloques2 = _Sin_Bloques(montos1, bloques1), _Sin_Bloques(montos2, bloques2)
+    rango1, _ = Indice_Ocurrencia(montos1, bloques1)
+    rango2, _ = Indice_Ocurrencia(montos2, bloques2)
+    llave1 = pd.DataFrame({"Bloque": bloques1, "Monto": montos1, "Rango": rango1, "Pos_x": np.arange(len(montos1))})
+    llave2 = pd.DataFrame({"Bloque": bloques2, "Monto": montos2, "Rango": rango2, "Pos_y": np.arange(len(montos2))})
+    pares = pd.merge(llave1, llave2, on=["Bloque", "Monto", "Rango"], how="inner")
+    return pares["Pos_x"].values, pares["Pos_y"].values
+
+def _Pares_En_Ventana(montos1, montos2, bloques1, bloques2, dias1, dias2, ventana):
+    # Monto exacto dentro del bloque y fechas a no más de `ventana` días; entre
+    # varios candidatos gana el de fecha más cercana. Sin armar el producto de
+    # los montos repetidos: cada fila solo propone a sus vecinas en fecha (la
+    # anterior y la siguiente del otro lado con igual bloque y monto, vía
+    # merge_asof). El par más cercano siempre está entre ellas; se empareja y
+    # se repite con las filas que siguen libres hasta que no quedan candidatos
+    libres_x = np.flatnonzero(~np.isnan(dias1))
+    libres_y = np.flatnonzero(~np.isnan(dias2))
+    elegidos_x, elegidos_y = [], []
+    while len(libres_x) and len(libres_y):
+        izquierda = pd.DataFrame({
+            "Bloque": bloques1[libres_x], "Monto": montos1[libres_x], "Dias": dias1[libres_x], "Pos_x": libres_x
+        }).sort_values("Dias", kind="stable")
+        derecha = pd.DataFrame({
+            "Bloque": bloques2[libres_y], "Monto": montos2[libres_y], "Dias": dias2[libres_y], "Pos_y": libres_y
+        }).sort_values("Dias", kind="stable")
+        vecinos = [
+            pd.merge_asof(uno, otro, on="Dias", by=["Bloque", "Monto"], direction=direccion,
+                          tolerance=float(ventana))[["Pos_x", "Pos_y"]]
+            for uno, otro in ((izquierda, derecha), (derecha, izquierda))
+            for direccion in ("backward", "forward")
+        ]
+        candidatos = pd.concat(vecinos, ignore_index=True).dropna().drop_duplicates()
+        if candidatos.empty:
+            break
+        pos_x = candidatos["Pos_x"].values.astype(np.int64)
+        pos_y = candidatos["Pos_y"].values.astype(np.int64)
+        pos_x, pos_y = _Emparejar(pos_x, pos_y, np.abs(dias1[pos_x] - dias2[pos_y]))
+        elegidos_x.append(pos_x)
+        elegidos_y.append(pos_y)
+        libres_x = libres_x[~np.isin(libres_x, pos_x)]
+        libres_y = libres_y[~np.isin(libres_y, pos_y)]
+    if not elegidos_x:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(elegidos_x), np.concatenate(elegidos_y)
+
+def _Celdas(montos, ancho):
+    # Celda de ancho `ancho` para cada monto; los enteros usan división entera
+    if pd.api.types.is_integer_dtype(montos.dtype):
+        return montos // max(int(ancho), 1)
+    return np.floor(montos / ancho).astype(np.int64)
+
+def _Tolerancia_Para(montos, tolerancia):
+    # Entre montos enteros |a - b| <= t equivale a |a - b| <= floor(t)
+    if pd.api.types.is_integer_dtype(montos.dtype):
+        return int(np.floor(tolerancia))
+    return float(tolerancia)
+
+def _Pares_Cercanos(montos1, montos2, tolerancia, bloques1=None, bloques2=None):
+    # Dentro de cada bloque y rango de ocurrencia se busca el monto más cercano;
+    # si dos filas de data1 apuntan al mismo movimiento se queda la de menor diferencia
+    bloques1, bloques2 = _Sin_Bloques(montos1, bloques1), _Sin_Bloques(montos2, bloques2)
+    izquierda = pd.DataFrame({
+        "Monto": montos1, "Bloque": bloques1, "Rango": Indice_Ocurrencia(montos1, bloques1)[0],
+        "Pos_x": np.arange(len(montos1))
+    }).sort_values("Monto", kind="stable")
+    derecha = pd.DataFrame({
+        "Monto": montos2, "Bloque": bloques2, "Rango": Indice_Ocurrencia(montos2, bloques2)[0],
+        "Pos_y": np.arange(len(montos2))
+    }).sort_values("Monto", kind="stable")
+    derecha["Monto_y"] = derecha["Monto"]
+    cruce = pd.merge_asof(
+        izquierda, derecha, on="Monto", by=["Bloque", "Rango"], direction="nearest",
+        tolerance=_Tolerancia_Para(montos1, tolerancia)
+    ).dropna(subset=["Pos_y"])
+    cruce["Diferencia"] = (cruce["Monto"] - cruce["Monto_y"]).abs()
+    cruce = cruce.sort_values("Diferencia", kind="stable").drop_duplicates("Pos_y")
+    return cruce["Pos_x"].values.astype(np.int64), cruce["Pos_y"].values.astype(np.int64)
+
+def _Pares_Cercanos_Fecha(montos1, montos2, bloques1, bloques2, dias1, dias2, tolerancia, ventana):
+    # Vecino más cercano en (monto, fecha) con una grilla ordenada: celdas de
+    # ancho `tolerancia` en monto y `ventana` en días, de modo que los candidatos
+    # de una fila están en su celda o en las 8 vecinas. La distancia se mide en
+    # unidades de cada tolerancia y la asignación es uno a uno, de menor a mayor
+    ancho_monto = tolerancia if tolerancia > 0 else 1
+    ancho_dias = float(ventana) if ventana > 0 else 1.0
+    validos1 = np.flatnonzero(~np.isnan(dias1))
+    validos2 = np.flatnonzero(~np.isnan(dias2))
+    derecha = pd.DataFrame({
+        "Bloque": bloques2[validos2],
+        "Celda_monto": _Celdas(montos2[validos2], ancho_monto),
+        "Celda_dias": np.floor(dias2[validos2] / ancho_dias).astype(np.int64),
+        "Pos_y": validos2,
+    })
+    celda_monto = _Celdas(montos1[validos1], ancho_monto)
+    celda_dias = np.floor(dias1[validos1] / ancho_dias).astype(np.int64)
+    partes = []
+    for paso_monto, paso_dias in itertools.product((-1, 0, 1), repeat=2):
+        izquierda = pd.DataFrame({
+            "Bloque": bloques1[validos1],
+            "Celda_monto": celda_monto + paso_monto,
+            "Celda_dias": celda_dias + paso_dias,
+            "Pos_x": validos1,
+        })
+        partes.append(pd.merge(izquierda, derecha, on=["Bloque", "Celda_monto", "Celda_dias"])[["Pos_x", "Pos_y"]])
+    candidatos = pd.concat(partes, ignore_index=True)
+    pos_x, pos_y = candidatos["Pos_x"].values, candidatos["Pos_y"].values
+    diferencia_monto = np.abs(montos1[pos_x] - montos2[pos_y])
+    diferencia_dias = np.abs(dias1[pos_x] - dias2[pos_y])
+    dentro = (diferencia_monto <= tolerancia) & (diferencia_dias <= ventana)
+    distancia = (diferencia_monto[dentro] / ancho_monto) ** 2 + (diferencia_dias[dentro] / ancho_dias) ** 2
+    return _Emparejar(pos_x[dentro], pos_y[dentro], distancia)
+
+def _Ngramas(textos, n=3, largo_maximo=200):
+    # n-gramas de caracteres del texto normalizado (minúsculas, solo letras y
+    # números, un espacio a cada lado). Tras normalizar todo carácter cabe en
+    # 8 bits, así que cada n-grama se codifica como un entero de 8*n bits.
+    # Devuelve (fila, código) sin repetidos dentro de cada fila
+    normalizados = (
+        pd.Series(textos, dtype=object).fillna("").astype(str).str.lower()
+        .str.replace(r"[^0-9a-záéíóúñü]+", " ", regex=True).str.strip()
+        .str.slice(0, largo_maximo)
+    )
+    normalizados = (" " + normalizados + " ").where(normalizados.str.len() > 0, "")
+    largos = normalizados.str.len().values.astype(np.int64)
+    ancho = max(int(largos.max(initial=0)), n)
+    letras = np.asarray(normalizados.tolist(), dtype=f"<U{ancho}").view(np.uint32)
+    letras = letras.reshape(len(largos), ancho).astype(np.int64)
+    codigos = np.zeros((len(largos), ancho - n + 1), dtype=np.int64)
+    for k in range(n):
+        codigos |= letras[:, k:ancho - n + 1 + k] << (8 * (n - 1 - k))
+    filas, columnas = np.nonzero(np.arange(ancho - n + 1) < (largos - n + 1)[:, None])
+    unicos, _ = _Contar_Unicos((filas << (8 * n)) | codigos[filas, columnas])
+    return unicos >> (8 * n), unicos & ((1 << (8 * n)) - 1)
+
+def _Contar_Unicos(valores):
+    # np.unique(return_counts=True) por ordenamiento (más rápido que por hash en int64)
+    ordenados = np.sort(valores)
+    if len(ordenados) == 0:
+        return ordenados, np.empty(0, dtype=np.int64)
+    inicio = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+    return ordenados[inicio], np.diff(np.r_[inicio, len(ordenados)])
+
+def _Unir_Llaves(llave1, llave2, orden=None):
+    # Join muchos-a-muchos de dos arreglos int64 por orden y búsqueda binaria;
+    # devuelve los índices (i, j) con llave1[i] == llave2[j]. `orden` (el
+    # argsort estable de llave2) se puede pasar si se une varias veces
+    if orden is None:
+        orden = np.argsort(llave2, kind="stable")
+    ordenadas = llave2[orden]
+    inicio = np.searchsorted(ordenadas, llave1, side="left")
+    cuenta = np.searchsorted(ordenadas, llave1, side="right") - inicio
+    i = np.repeat(np.arange(len(llave1)), cuenta)
+    desplazamiento = np.arange(len(i)) - np.repeat(np.cumsum(cuenta) - cuenta, cuenta)
+    return i, orden[np.repeat(inicio, cuenta) + desplazamiento]
+
+def _Posicion_En_Grupo(valores):
+    # Posición (desde 0) de cada elemento dentro de su tramo de valores iguales
+    # consecutivos (valores ya ordenados)
+    posicion = np.arange(len(valores))
+    if len(valores) == 0:
+        return posicion
+    inicio = np.r_[True, valores[1:] != valores[:-1]]
+    return posicion - np.maximum.accumulate(np.where(inicio, posicion, 0))
+
+def _Gramas_Comunes(filas1, gramas1, llaves2, pos_x, pos_y, n):
+    # Cantidad de n-gramas que comparte cada par (pos_x, pos_y): los n-gramas
+    # de cada x se buscan en `llaves2`, la lista ordenada fila << 8n | n-grama
+    # de data2
+    inicio1 = np.searchsorted(filas1, pos_x)
+    cuenta = np.searchsorted(filas1, pos_x, side="right") - inicio1
+    par = np.repeat(np.arange(len(pos_x)), cuenta)
+    gramas = gramas1[np.repeat(inicio1, cuenta) + np.arange(len(par)) - np.repeat(np.cumsum(cuenta) - cuenta, cuenta)]
+    buscadas = (pos_y[par] << (8 * n)) | gramas
+    posicion = np.minimum(np.searchsorted(llaves2, buscadas), max(len(llaves2) - 1, 0))
+    encontradas = llaves2[posicion] == buscadas if len(llaves2) else np.zeros(len(par), dtype=bool)
+    return np.bincount(par, weights=encontradas, minlength=len(pos_x)).astype(np.int64)
+
+def _Pares_Texto(montos1, montos2, bloques1, bloques2, textos1, textos2, tolerancia, umbral,
+                 dias1=None, dias2=None, ventana=None, n=3, frecuencia_rara=50, rarezas=5,
+                 max_frecuencia=1000, max_candidatos=20, lote=1000):
+    # Índice invertido de n-gramas por bloque de monto (celdas de ancho
+    # `tolerancia`): solo se puntúan los pares que comparten algún n-grama y
+    # caen en la misma celda o en una vecina. Para no multiplicar los n-gramas
+    # comunes (un prefijo como "transferencia via cca"), una fila de data1
+    # propone candidatos con los n-gramas que aparecen en a lo más
+    # `frecuencia_rara` filas de data2 de la celda, más sus `rarezas` n-gramas
+    # menos frecuentes (nunca uno presente en más de `max_frecuencia` filas), y
+    # conserva a lo más `max_candidatos`: los que más de esos n-gramas comparten.
+    # Se arma por lotes de `lote` filas de data1 y los candidatos se puntúan con
+    # el Jaccard de todos sus n-gramas; la asignación es uno a uno del mayor al
+    # menor puntaje
+    filas1, gramas1 = _Ngramas(textos1, n)
+    filas2, gramas2 = _Ngramas(textos2, n)
+    cantidad1 = np.bincount(filas1, minlength=len(montos1))
+    cantidad2 = np.bincount(filas2, minlength=len(montos2))
+    pasos = (-1, 0, 1) if tolerancia > 0 else (0,)
+    ancho = tolerancia if tolerancia > 0 else 1
+    celda1 = _Celdas(montos1, ancho)
+    celda2 = _Celdas(montos2, ancho)
+
+    # (bloque, celda) se numera en un entero denso y se combina con el n-grama
+    # en una sola llave int64
+    celdas, _ = pd.factorize(np.concatenate([celda2] + [celda1 + paso for paso in pasos]))
+    bloques = np.concatenate([bloques2] + [bloques1] * len(pasos))
+    cubetas, _ = pd.factorize(bloques * (int(celdas.max(initial=0)) + 1) + celdas)
+    cubetas = cubetas.astype(np.int64) << (8 * n)
+    llave2 = cubetas[:len(montos2)][filas2] | gramas2
+    claves, frecuencia = _Contar_Unicos(llave2)
+    orden2 = np.argsort(llave2, kind="stable")
+    # _Ngramas entrega (fila, n-grama) ya ordenado
+    llaves2 = (filas2 << (8 * n)) | gramas2
+
+    m = max(len(montos2), 1)
+    candidatos = []
+    for inicio in range(0, len(montos1), lote):
+        desde, hasta = np.searchsorted(filas1, [inicio, inicio + lote])
+        filas = np.tile(filas1[desde:hasta], len(pasos))
+        llaves = np.concatenate([
+            cubetas[len(montos2) + numero * len(montos1):len(montos2) + (numero + 1) * len(montos1)][filas1[desde:hasta]]
+            | gramas1[desde:hasta]
+            for numero in range(len(pasos))
+        ])
+        # Frecuencia en data2 de cada (celda, n-grama); 0 si no aparece
+        veces = np.zeros(len(llaves), dtype=np.int64)
+        if len(claves):
+            posicion = np.minimum(np.searchsorted(claves, llaves), len(claves) - 1)
+            veces = np.where(claves[posicion] == llaves, frecuencia[posicion], 0)
+        utiles = (veces > 0) & (veces <= max_frecuencia)
+        filas, llaves, veces = filas[utiles], llaves[utiles], veces[utiles]
+        orden = np.lexsort((veces, filas))
+        filas, llaves, veces = filas[orden], llaves[orden], veces[orden]
+        raras = (veces <= frecuencia_rara) | (_Posicion_En_Grupo(filas) < rarezas)
+        filas, llaves = filas[raras], llaves[raras]
+        i, j = _Unir_Llaves(llaves, llave2, orden2)
+        pares, comunes = _Contar_Unicos(filas[i] * m + filas2[j])
+        pos_x, pos_y = np.divmod(pares, m)
+        dentro = np.abs(montos1[pos_x] - montos2[pos_y]) <= tolerancia
+        if ventana is not None:
+            dentro &= np.abs(dias1[pos_x] - dias2[pos_y]) <= ventana
+        pos_x, pos_y, comunes = pos_x[dentro], pos_y[dentro], comunes[dentro]
+        orden = np.lexsort((-comunes, pos_x))
+        pos_x, pos_y = pos_x[orden], pos_y[orden]
+        conservar = _Posicion_En_Grupo(pos_x) < max_candidatos
+        pos_x, pos_y = pos_x[conservar], pos_y[conservar]
+        comunes = _Gramas_Comunes(filas1, gramas1, llaves2, pos_x, pos_y, n)
+        puntaje = comunes / np.maximum(cantidad1[pos_x] + cantidad2[pos_y] - comunes, 1)
+        dentro = puntaje >= umbral
+        candidatos.append((pos_x[dentro], pos_y[dentro], puntaje[dentro]))
+
+    if not candidatos:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pos_x, pos_y, puntaje = (np.concatenate(partes) for partes in zip(*candidatos))
+    diferencia = np.abs(montos1[pos_x] - montos2[pos_y])
+    # A igual puntaje gana la menor diferencia de monto
+    orden = np.argsort(diferencia, kind="stable")
+    return _Emparejar(pos_x[orden], pos_y[orden], -puntaje[orden])
+
+def Cruce_Exacto(data1, data2, Cruze):
+    """
+    Cruza por monto exacto y número de ocurrencia mediante un hash join.
+    Devuelve la tabla de pares Id_x / Id_y encontrados.
+    """
+    montos1, montos2 = _Montos_Comparables(data1[Cruze], data2[Cruze])
+    pos_x, pos_y = _Pares_Exactos(montos1, montos2)
+    return pd.DataFrame({"Id_x": data1["Id_x"].values[pos_x], "Id_y": data2["Id_y"].values[pos_y]})
+
+def _Unir_Pares(pares, data1, data2):
+    Encontrado = pd.merge(pares, data1, on="Id_x", how="left")
+    return pd.merge(Encontrado, data2, on="Id_y", how="left")
+
+def _Posiciones_Por_Bloque(posiciones, bloques):
+    # {bloque: posiciones ordenadas} sin recorrer los grupos en Python
+    if len(posiciones) == 0:
+        return {}
+    ordenadas = posiciones[np.argsort(bloques[posiciones], kind="stable")]
+    valores = bloques[ordenadas]
+    cortes = np.flatnonzero(valores[1:] != valores[:-1]) + 1
+    return dict(zip(valores[np.r_[0, cortes]].tolist(), np.split(ordenadas, cortes)))
+
+def _Combinar_Bloque(estado, montos1, montos2, dias1, dias2, filas_x, filas_y, config, registros, bloque):
+    # Etapa muchos-a-uno: varios movimientos de data2 que suman un registro de data1
+    presupuesto = (config.presupuesto or Presupuesto()).iniciar()
+    for tamaño in range(2, config.tamaño_maximo + 1):
+        libres_x = filas_x[estado.libre_x[filas_x]]
+        libres_y = filas_y[estado.libre_y[filas_y]]
+        if len(libres_x) == 0 or len(libres_y) < tamaño:
+            break
+        inicio = _Iniciar_Medicion() if config.medir else None
+        candidatos = presupuesto.candidatos
+        asignaciones = Subconjuntos_Suma(
+            montos1[libres_x], montos2[libres_y], tamaño, config.tolerancia, presupuesto,
+            *((dias2[libres_y], config.ventana_dias, dias1[libres_x]) if dias2 is not None else ())
+        )
+        for i, elegidos in asignaciones:
+            estado.marcar(
+                np.repeat(libres_x[i], len(elegidos)), libres_y[elegidos], ETAPA_COMBINACION
             )
-            No_Encontrado = data1[
-                data1["Id_x"].isin(Resultado.loc[pd.isna(Resultado["Id_y"]), "Id_x"].values)
-            ].copy()
-            No_Encontrado.loc[:, f"{Cruze}_Indice"] = No_Encontrado[f"{Cruze}_Indice"].astype(float)
-            Resultado_comb.loc[:, f"{Cruze}_Indice"] = Resultado_comb[f"{Cruze}_Indice"].astype(float)
-            No_Encontrado = No_Encontrado.sort_values(by=f"{Cruze}_Indice").copy()
-            Resultado_comb = Resultado_comb.sort_values(by=f"{Cruze}_Indice").copy()
-            Encontrado1 = pd.merge_asof(
-                No_Encontrado, 
-                Resultado_comb, 
-                on=f"{Cruze}_Indice", 
-                direction="nearest", 
-                tolerance=tolerancia
+        if config.medir:
+            _Registrar_Etapa(registros, "combinacion", inicio, (len(libres_x), len(libres_y)),
+                             grupo=bloque, tamaño=tamaño, pares=len(asignaciones),
+                             filas_x_salida=int(estado.libre_x[libres_x].sum()),
+                             filas_y_salida=int(estado.libre_y[libres_y].sum()),
+                             candidatos=presupuesto.candidatos - candidatos)
+        if presupuesto.agotado:
+            # Resultado parcial: lo que quedó libre en el bloque se informa como sin resolver
+            estado.sin_resolver[filas_x[estado.libre_x[filas_x]]] = True
+            break
+
+def _Procesar_Pares(data1, data2, config):
+    # Cruza todos los bloques (_Bloque) de una vez; solo la etapa combinatoria
+    # recorre, uno a uno, los bloques que quedaron con filas libres en ambos lados.
+    # Devuelve la tabla de pares y, si config.medir, sus mediciones
+    registros = [] if config.medir else None
+    estado = EstadoCruce.desde_tablas(data1, data2)
+    bloques1 = estado.bloque_x
+    bloques2 = data2["_Bloque"].values if "_Bloque" in data2 else np.zeros(len(data2), dtype=np.int64)
+    montos1, montos2 = _Montos_Comparables(data1[config.Cruze], data2[config.Cruze], config.decimales)
+    # Un monto nulo no participa en ninguna etapa; al final vuelve como sin cruce
+    nulos_x, nulos_y = data1[config.Cruze].isna().values, data2[config.Cruze].isna().values
+    estado.libre_x &= ~nulos_x
+    estado.libre_y &= ~nulos_y
+    if config.decimales is not None:
+        # Todas las etapas trabajan en unidades mínimas, también la tolerancia.
+        # Entre enteros |a - b| <= t equivale a |a - b| <= floor(t) (como en
+        # _Tolerancia_Para); el redondeo previo absorbe el ruido binario
+        escalada = np.round(float(config.tolerancia) * 10 ** config.decimales, 6)
+        config = replace(config, tolerancia=int(np.floor(escalada)))
+    tolerancia = config.tolerancia
+    ventana = config.ventana_dias if config.fecha is not None else None
+    dias1 = dias2 = None
+    if ventana is not None:
+        dias1, dias2 = _Dias(data1[config.fecha]), _Dias(data2[config.fecha])
+
+    # Etapa exacta: saca los pares idénticos antes de las etapas costosas
+    libres_x, libres_y = estado.pendientes()
+    inicio = _Iniciar_Medicion() if config.medir else None
+    if ventana is None:
+        pos_x, pos_y = _Pares_Exactos(montos1[libres_x], montos2[libres_y], bloques1[libres_x], bloques2[libres_y])
+    else:
+        pos_x, pos_y = _Pares_En_Ventana(montos1[libres_x], montos2[libres_y], bloques1[libres_x],
+                                         bloques2[libres_y], dias1[libres_x], dias2[libres_y], ventana)
+    estado.marcar(libres_x[pos_x], libres_y[pos_y], ETAPA_EXACTA)
+    if config.medir:
+        _Registrar_Etapa(registros, "exacta", inicio, (len(libres_x), len(libres_y)), estado,
+                         pares=len(pos_x))
+
+    # Etapa de tolerancia sobre lo que quedó libre
+    libres_x, libres_y = estado.pendientes()
+    if tolerancia > 0 and len(libres_x) and len(libres_y):
+        inicio = _Iniciar_Medicion() if config.medir else None
+        if ventana is None:
+            pos_x, pos_y = _Pares_Cercanos(
+                montos1[libres_x], montos2[libres_y], tolerancia, bloques1[libres_x], bloques2[libres_y]
             )
-            columnas_base = list(Encontrado1.columns)
-            if 0 in columnas_base:
-                columnas_base = columnas_base[:columnas_base.index(0) + 1]
-            
-            
-            Encontrado1 = pd.merge(
-                Encontrado1[columnas_base], 
-                Resultado_comb, 
-                on=0, 
-                how="left"
+        else:
+            pos_x, pos_y = _Pares_Cercanos_Fecha(
+                montos1[libres_x], montos2[libres_y], bloques1[libres_x], bloques2[libres_y],
+                dias1[libres_x], dias2[libres_y], tolerancia, ventana
             )
-            R_clasificados = Resultado.loc[~pd.isna(Resultado["Id_y"])]
-            if not R_clasificados.empty:
-                Resultado_final = pd.concat([R_clasificados, Encontrado1], ignore_index=True)
-            else:
-                Resultado_final = Encontrado1
-            # En vez de forzar columnas_resultado, dejamos todo:
-            Resultado = Resultado_final
-    return Resultado
-
-def Proceso(data1, data2, Cruze, Agrupacion="", tolerancia=0):
-    data1 = data1.copy()
-    data2 = data2.copy()
-    data1.loc[:, "Id_x"] = range(1, data1.shape[0] + 1)
-    data2.loc[:, "Id_y"] = range(1, data2.shape[0] + 1)
-    if not Agrupacion:
-        Todos = Procesador(data1, data2, Cruze, tolerancia)
+        estado.marcar(libres_x[pos_x], libres_y[pos_y], ETAPA_TOLERANCIA)
+        if config.medir:
+            _Registrar_Etapa(registros, "tolerancia", inicio, (len(libres_x), len(libres_y)), estado,
+                             pares=len(pos_x))
+
+    # Etapa de texto (opcional), de respaldo: entre las filas que siguen libres
+    # la glosa decide los pares del mismo bloque de monto
+    libres_x, libres_y = estado.pendientes()
+    if config.texto is not None and len(libres_x) and len(libres_y):
+        inicio = _Iniciar_Medicion() if config.medir else None
+        texto1, texto2 = config.texto
+        pos_x, pos_y = _Pares_Texto(
+            montos1[libres_x], montos2[libres_y], bloques1[libres_x], bloques2[libres_y],
+            data1[texto1].values[libres_x], data2[texto2].values[libres_y], tolerancia, config.umbral_texto,
+            *((dias1[libres_x], dias2[libres_y], ventana) if ventana is not None else ())
+        )
+        estado.marcar(libres_x[pos_x], libres_y[pos_y], ETAPA_TEXTO)
+        if config.medir:
+            _Registrar_Etapa(registros, "texto", inicio, (len(libres_x), len(libres_y)), estado,
+                             pares=len(pos_x))
+
+    libres_x, libres_y = estado.pendientes()
+    grupos_x = _Posiciones_Por_Bloque(libres_x, bloques1)
+    grupos_y = _Posiciones_Por_Bloque(libres_y, bloques2)
+    for bloque in sorted(set(grupos_x) & set(grupos_y)):
+        _Combinar_Bloque(estado, montos1, montos2, dias1, dias2, grupos_x[bloque], grupos_y[bloque], config,
+                         registros, bloque)
+
+    estado.libre_x |= nulos_x
+    return estado.tabla(), registros
+
+def Procesador(data1, data2, Cruze, tolerancia, presupuesto=None, fecha=None, ventana_dias=None,
+               decimales=None):
+    """
+    Cruza data1 / data2 (con Id_x / Id_y) y devuelve los pares unidos a ambas
+    tablas. Con `fecha` y `ventana_dias` la etapa de tolerancia busca el vecino
+    más cercano en monto y fecha a la vez (tolerancia y ventana por separado).
+    Con `decimales` los montos se cruzan como enteros en unidades mínimas.
+    """
+    config = ConfiguracionCruce(Cruze, tolerancia, presupuesto, fecha=fecha, ventana_dias=ventana_dias,
+                                decimales=decimales)
+    Resultado, _ = _Procesar_Pares(data1, data2, config)
+    return _Unir_Pares(Resultado.drop(columns=["Etapa", "Grupo"]), data1, data2)
+
+def _Procesar_En_Paralelo(data1, data2, config, procesos, tareas_por_proceso=4):
+    # Se reparten bloques completos en tareas de tamaño parecido (los más
+    # grandes primero, en turnos); cada tarea cruza sus bloques vectorizado
+    bloques1 = data1["_Bloque"].values
+    bloques2 = data2["_Bloque"].values
+    cantidad = int(max(bloques1.max(initial=-1), bloques2.max(initial=-1))) + 1
+    filas = np.bincount(bloques1, minlength=cantidad) + np.bincount(bloques2, minlength=cantidad)
+    tareas = procesos * tareas_por_proceso
+    destino = np.empty(cantidad, dtype=np.int64)
+    destino[np.argsort(-filas, kind="stable")] = np.arange(cantidad) % tareas
+
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = [
+            ejecutor.submit(_Procesar_Pares, data1[destino[bloques1] == tarea],
+                            data2[destino[bloques2] == tarea], config)
+            for tarea in range(tareas)
+        ]
+        resultados = [futuro.result() for futuro in futuros]
+    Todos = pd.concat([tabla for tabla, _ in resultados], ignore_index=True)
+    Todos = Todos.sort_values("Grupo", kind="stable", ignore_index=True)
+    registros = None
+    if config.medir:
+        registros = [registro for _, parte in resultados for registro in parte]
+    return Todos, registros
+
+def _Cruzar_Grupos(data1, data2, config, Agrupacion="", procesos=None, estadisticas=None):
+    # data1 y data2 ya traen Id_x / Id_y. Las claves exactas de Agrupacion (una
+    # columna o varias) se numeran en bloques y todos se cruzan juntos. Devuelve
+    # la tabla de pares con la etapa y el número de bloque (posición de la clave
+    # en la lista ordenada de claves)
+    bloques1, bloques2, claves = _Bloques(data1, data2, Agrupacion)
+    llave1 = data1[config.columnas(0) + ["Id_x"]].assign(_Bloque=bloques1)
+    llave2 = data2[config.columnas(1) + ["Id_y"]].assign(_Bloque=bloques2)
+    if _Columnas(Agrupacion):
+        # Solo se cruzan los bloques presentes en ambos lados
+        comunes = np.intersect1d(bloques1[bloques1 >= 0], bloques2[bloques2 >= 0])
+        llave1 = llave1[np.isin(bloques1, comunes)]
+        llave2 = llave2[np.isin(bloques2, comunes)]
+
+    if procesos and procesos > 1 and len(claves) > 1 and len(llave1):
+        Todos, registros = _Procesar_En_Paralelo(llave1, llave2, config, procesos)
     else:
-        lista_resultados = []
-        for valor_grupo in np.unique(data1[Agrupacion].values):
-            df1_subset = data1[data1[Agrupacion] == valor_grupo].copy()
-            df2_subset = data2[data2[Agrupacion] == valor_grupo].copy()
-            if df1_subset.shape[0]>0 and df2_subset.shape[0]>0:
-                resultado_parcial = Procesador(df1_subset, df2_subset, Cruze, tolerancia)
-                lista_resultados.append(resultado_parcial)
-        Todos = pd.concat(lista_resultados, ignore_index=True)
-    
-    tabla_cruzada=Todos[["Id_x","Id_y"]]
-    Todo1=pd.merge(tabla_cruzada,data1,on="Id_x",how="left")
-    Todo2=pd.merge(Todo1,data2,on="Id_y",how="left")
-    return Todo2
\ No newline at end of file
+        Todos, registros = _Procesar_Pares(llave1, llave2, config)
+    if estadisticas is not None:
+        for registro in registros:
+            if registro.get("grupo") is not None:
+                registro["grupo"] = claves[registro["grupo"]]
+        estadisticas.agregar(registros)
+    return Todos, claves
+
+@dataclass
+class ResultadoCruce:
+    """
+    Resultado compacto de un cruce: por cada par, la posición de la fila en data1
+    y en data2 (-1 si no cruzó), la etapa que lo encontró y el número de grupo.
+    Las columnas de las tablas originales se arman solo al pedirlas.
+    """
+
+    pos_x: np.ndarray
+    pos_y: np.ndarray
+    etapa: np.ndarray
+    grupo: np.ndarray
+    data1: pd.DataFrame
+    data2: pd.DataFrame
+    claves_grupo: List[Any] = field(default_factory=list)
+
+    @classmethod
+    def desde_tabla(cls, Todos, data1, data2, claves_grupo) -> 'ResultadoCruce':
+        id_y = Todos["Id_y"].values.astype(float)
+        cruzados = ~np.isnan(id_y)
+        pos_y = np.full(len(id_y), -1, dtype=np.int64)
+        pos_y[cruzados] = id_y[cruzados].astype(np.int64) - 1
+        return cls(
+            pos_x=Todos["Id_x"].values.astype(np.int64) - 1,
+            pos_y=pos_y,
+            etapa=Todos["Etapa"].values.astype(np.int8),
+            grupo=Todos["Grupo"].values.astype(np.int64),
+            data1=data1,
+            data2=data2,
+            claves_grupo=list(claves_grupo),
+        )
+
+    def __len__(self):
+        return len(self.pos_x)
+
+    def pares(self, detalle: bool = False) -> pd.DataFrame:
+        """Tabla Id_x / Id_y (1-based, Id_y nulo si no cruzó); con detalle agrega etapa y grupo."""
+        tabla = pd.DataFrame({
+            "Id_x": self.pos_x + 1,
+            "Id_y": np.where(self.pos_y >= 0, self.pos_y + 1, np.nan),
+        })
+        if detalle:
+            tabla["Etapa"] = pd.Categorical.from_codes(self.etapa, categories=list(ETAPAS))
+            claves = np.empty(len(self.claves_grupo) + 1, dtype=object)
+            claves[:len(self.claves_grupo)] = self.claves_grupo
+            tabla["Grupo"] = claves[self.grupo]
+        return tabla
+
+    def materializar(self, columnas1: Optional[List[str]] = None,
+                     columnas2: Optional[List[str]] = None, detalle: bool = False) -> pd.DataFrame:
+        """
+        Arma la vista cruzada (misma forma que entrega Proceso) tomando las filas por
+        posición. Se pueden pedir solo algunas columnas de cada tabla.
+        """
+        lado1 = self.data1.drop(columns=["Id_x"], errors="ignore")
+        lado2 = self.data2.drop(columns=["Id_y"], errors="ignore")
+        if columnas1 is not None:
+            lado1 = lado1[list(columnas1)]
+        if columnas2 is not None:
+            lado2 = lado2[list(columnas2)]
+
+        lado1 = lado1.take(self.pos_x).reset_index(drop=True)
+        cruzados = self.pos_y >= 0
+        if cruzados.all():
+            lado2 = lado2.take(self.pos_y).reset_index(drop=True)
+        else:
+            # reindex sobre posiciones con -1 rellena con nulos las filas sin cruce
+            lado2 = lado2.set_axis(range(len(lado2)), axis=0).reindex(self.pos_y).reset_index(drop=True)
+
+        comunes = set(lado1.columns) & set(lado2.columns)
+        lado1 = lado1.rename(columns={c: f"{c}_x" for c in comunes})
+        lado2 = lado2.rename(columns={c: f"{c}_y" for c in comunes})
+        vista = pd.concat([self.pares(detalle=detalle), lado1, lado2], axis=1)
+        return vista
+
+def Proceso(data1, data2, Cruze, Agrupacion="", tolerancia=0, procesos=None, compacto=False,
+            presupuesto=None, estadisticas: Union[bool, EstadisticasCruce] = False,
+            fecha=None, ventana_dias=None, tamaño_maximo=9, texto=None, umbral_texto=0.3,
+            decimales=None):
+    """
+    Cruza data1 contra data2 por la columna `Cruze`. Con `Agrupacion` (una columna
+    o una lista, p. ej. ["RUT", "TIPO_DOC", "FOLIO"]) el cruce se hace dentro de
+    cada combinación exacta de claves; con `procesos` > 1 los grupos se reparten
+    en un pool de procesos. El resultado sigue el orden de las claves de grupo.
+    Con `fecha` y `ventana_dias` solo cruzan filas cuyas fechas (columna `fecha`
+    en ambas tablas) difieren a lo más en esa cantidad de días, y la etapa de
+    tolerancia elige el vecino más cercano en monto y fecha; en la etapa de
+    combinaciones los movimientos de cada subconjunto deben caer dentro de la
+    ventana. `tamaño_maximo` es la mayor cantidad de movimientos por combinación.
+    Con `texto` (una columna, o el par (columna de data1, columna de data2)) se
+    agrega, tras las etapas exacta y de tolerancia, una etapa que cruza las filas
+    aún libres por similitud de glosa (Jaccard de trigramas >= `umbral_texto`)
+    entre filas del mismo bloque de monto.
+    Con `decimales` (p. ej. 2) el monto y la tolerancia se llevan una vez a
+    unidades mínimas int64 y todas las etapas comparan enteros exactos.
+    Con `compacto=True` devuelve un ResultadoCruce en vez de la tabla cruzada.
+    `presupuesto` (Presupuesto) limita la búsqueda combinatoria de cada grupo.
+    Con `estadisticas` (True o un EstadisticasCruce) devuelve (resultado, estadísticas).
+    """
+    if estadisticas is True:
+        estadisticas = EstadisticasCruce()
+    elif estadisticas is False:
+        estadisticas = None
+    medir = estadisticas is not None
+    iniciar_traza = medir and estadisticas.memoria and not tracemalloc.is_tracing()
+    if iniciar_traza:
+        tracemalloc.start()
+
+    try:
+        inicio = _Iniciar_Medicion()
+        # Solo las columnas de cruce viajan por las etapas; el resto se toma al final
+        config = ConfiguracionCruce(Cruze, tolerancia, presupuesto, medir, fecha, ventana_dias,
+                                    tamaño_maximo, texto, umbral_texto, decimales)
+        llave1 = data1[_Columnas(Agrupacion) + config.columnas(0)].reset_index(drop=True)
+        llave1["Id_x"] = np.arange(1, data1.shape[0] + 1)
+        llave2 = data2[_Columnas(Agrupacion) + config.columnas(1)].reset_index(drop=True)
+        llave2["Id_y"] = np.arange(1, data2.shape[0] + 1)
+        Todos, claves = _Cruzar_Grupos(llave1, llave2, config, Agrupacion, procesos, estadisticas)
+        resultado = ResultadoCruce.desde_tabla(Todos, data1, data2, claves)
+        if medir:
+            registros = []
+            _Registrar_Etapa(registros, "cruce", inicio, (len(data1), len(data2)),
+                             pares=int((resultado.pos_y >= 0).sum()))
+            estadisticas.agregar(registros)
+
+        if not compacto:
+            inicio = _Iniciar_Medicion()
+            resultado = resultado.materializar()
+            if medir:
+                registros = []
+                _Registrar_Etapa(registros, "materializar", inicio, (len(data1), len(data2)))
+                estadisticas.agregar(registros)
+    finally:
+        if iniciar_traza:
+            tracemalloc.stop()
+
+    if medir:
+        return resultado, estadisticas
+    return resultado
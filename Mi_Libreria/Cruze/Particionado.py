@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from ..Principal.Principal import DataProcessor
+from .Cruze import ConfiguracionCruce, _Cruzar_Grupos
+
+
+def Leer_Por_Bloques(origen, tamaño_bloque=100000):
+    """
+    Entrega un origen de datos como bloques de DataFrame. Acepta la ruta de un
+    CSV, Parquet o Excel, un DataFrame o cualquier iterable de DataFrames (ver
+    DataProcessor.leer_por_bloques).
+    """
+    return DataProcessor.leer_por_bloques(origen, tamaño_bloque)
+
+
+def _Escribir_Particiones(origen, Agrupacion, columna_id, directorio, particiones, tamaño_bloque):
+    # Cada bloque se reparte por hash de la clave de grupo; un grupo completo
+    # siempre queda en la misma partición
+    siguiente_id = 1
+    for numero, bloque in enumerate(Leer_Por_Bloques(origen, tamaño_bloque)):
+        bloque = bloque.copy()
+        bloque[columna_id] = range(siguiente_id, siguiente_id + len(bloque))
+        siguiente_id += len(bloque)
+        destino = pd.util.hash_pandas_object(
+            bloque[Agrupacion].astype(str), index=False
+        ).values % particiones
+        for particion, pedazo in bloque.groupby(destino):
+            carpeta = directorio / f"{columna_id}_{particion:05d}"
+            carpeta.mkdir(exist_ok=True)
+            pedazo.to_pickle(carpeta / f"{numero:07d}.pkl")
+
+
+def _Leer_Particion(directorio, columna_id, particion):
+    carpeta = directorio / f"{columna_id}_{particion:05d}"
+    if not carpeta.exists():
+        return None
+    return pd.concat(
+        [pd.read_pickle(archivo) for archivo in sorted(carpeta.iterdir())],
+        ignore_index=True
+    )
+
+
+def Proceso_Particionado(origen1, origen2, Cruze, Agrupacion, salida, tolerancia=0,
+                         particiones=64, tamaño_bloque=100000, procesos=None,
+                         directorio_temporal=None, presupuesto=None, fecha=None, ventana_dias=None,
+                         tamaño_maximo=9, texto=None, umbral_texto=0.3,
+                         decimales=None):
+    """
+    Versión fuera de memoria de Proceso. Reparte ambos orígenes en disco por la
+    clave de `Agrupacion` (una columna o una lista), cruza una partición a la
+    vez y va escribiendo los pares en `salida` (un CSV, o una carpeta con un
+    Parquet por partición).
+    Id_x / Id_y corresponden al orden de las filas en cada origen, igual que en
+    Proceso. Devuelve la cantidad de filas escritas.
+    """
+    salida = Path(salida)
+    como_csv = salida.suffix.lower() == ".csv"
+    if como_csv:
+        if salida.exists():
+            salida.unlink()
+    else:
+        salida.mkdir(parents=True, exist_ok=True)
+
+    config = ConfiguracionCruce(Cruze, tolerancia, presupuesto, fecha=fecha, ventana_dias=ventana_dias,
+                                tamaño_maximo=tamaño_maximo, texto=texto, umbral_texto=umbral_texto,
+                                decimales=decimales)
+    directorio = Path(tempfile.mkdtemp(prefix="cruce_", dir=directorio_temporal))
+    filas_escritas = 0
+    try:
+        _Escribir_Particiones(origen1, Agrupacion, "Id_x", directorio, particiones, tamaño_bloque)
+        _Escribir_Particiones(origen2, Agrupacion, "Id_y", directorio, particiones, tamaño_bloque)
+
+        for particion in range(particiones):
+            data1 = _Leer_Particion(directorio, "Id_x", particion)
+            data2 = _Leer_Particion(directorio, "Id_y", particion)
+            if data1 is None or data2 is None:
+                continue
+            Todos, _ = _Cruzar_Grupos(data1, data2, config, Agrupacion, procesos)
+            if Todos.empty:
+                continue
+            Todo1 = pd.merge(Todos[["Id_x", "Id_y"]], data1, on="Id_x", how="left")
+            Todo2 = pd.merge(Todo1, data2, on="Id_y", how="left")
+
+            if como_csv:
+                Todo2.to_csv(salida, mode="a", header=filas_escritas == 0, index=False)
+            else:
+                Todo2.to_parquet(salida / f"parte_{particion:05d}.parquet", index=False)
+            filas_escritas += len(Todo2)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    return filas_escritas
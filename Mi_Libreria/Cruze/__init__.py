@@ -1,3 +1,5 @@
 # Initialization file for Cruze module
 
 from .Cruze import *
+from .Particionado import *
+from .Almacen import *
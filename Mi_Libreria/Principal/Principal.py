@@ -2,12 +2,216 @@ import pandas as pd
 import warnings
 import numpy as np
 import itertools
+import os
+import importlib.util
+import tempfile
 import re
-from typing import List, Union, Optional, Dict, Any, Tuple
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union, Optional, Dict, Any, Tuple, Iterator
 
 from pandas.api.types import (is_numeric_dtype, is_bool_dtype,
                               is_datetime64_any_dtype,is_string_dtype)
 
+# Patrones compilados una vez para la limpieza por columna
+_NO_NUMERICO = re.compile(r"[^\d,.\-]")
+_VALORES_BOOLEANOS = {"true", "false", "sí", "si", "no", "verdadero", "falso", "1", "0"}
+# Con Copy-on-Write (siempre activo desde pandas 3) basta una copia superficial
+_COPIA_DIFERIDA = int(pd.__version__.split(".")[0]) >= 3
+# Texto con a lo más esta proporción de valores distintos pasa a category
+_PROPORCION_CATEGORIA = 0.5
+_HAY_PYARROW = importlib.util.find_spec("pyarrow") is not None
+_TIPOS_ESQUEMA = ("fechas", "booleanas", "texto", "decimales", "enteros")
+# Palabras de un nombre de columna, separando también camelCase ("fechaPago")
+_PATRON_PALABRAS = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+# Textos más largos no se limpian en matriz de caracteres sino valor a valor
+_ANCHO_LIMPIEZA = 64
+
+# Formatos de fecha que se prueban, en orden (día primero, como en Chile)
+_FORMATOS_FECHA = ("%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d", "%Y/%m/%d",
+                   "%d-%m-%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S",
+                   "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+_PATRON_FECHA = re.compile(r"^\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}")
+_FECHA_EXCEL = "excel"        # seriales de Excel (días desde 1899-12-30)
+_FECHA_INFERIDA = "inferido"  # sin formato fijo: pandas lo deduce con dayfirst
+# Formato detectado por nombre de columna, reutilizado entre llamadas
+_formatos_fecha: Dict[Any, str] = {}
+
+
+def _huella_numeros(serie: pd.Series) -> np.ndarray:
+    """
+    Hash de cada valor numérico: los enteros (o decimales sin parte decimal)
+    como int64, para que 5 y 5.0 coincidan sin perder precisión sobre 2**53;
+    el resto como float64
+    """
+    decimales = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    huellas = pd.util.hash_pandas_object(pd.Series(decimales), index=False).to_numpy(copy=True)
+    if pd.api.types.is_integer_dtype(serie):
+        enteros = serie.notna().to_numpy()
+        valores = serie[enteros].to_numpy(dtype=np.int64)
+    else:
+        enteros = np.isfinite(decimales) & (decimales % 1 == 0) & (np.abs(decimales) < 2.0 ** 63)
+        valores = decimales[enteros].astype(np.int64)
+    huellas[enteros] = pd.util.hash_pandas_object(pd.Series(valores), index=False).values
+    return huellas
+
+
+def _presentes(huellas: np.ndarray, huellas_otra: np.ndarray) -> np.ndarray:
+    """
+    Marca las filas cuya (huella, ocurrencia) existe en la otra tabla: la
+    k-ésima repetición de una huella está si la otra la tiene al menos k veces
+    """
+    otra = np.sort(huellas_otra)
+    cantidad = np.searchsorted(otra, huellas, "right") - np.searchsorted(otra, huellas, "left")
+    ocurrencias = pd.Series(huellas).groupby(huellas, sort=False).cumcount().values + 1
+    return ocurrencias <= cantidad
+
+
+def _distintos_aproximados(huellas: np.ndarray, precision: int = 14) -> int:
+    """Cantidad aproximada de valores distintos (HyperLogLog, error ~0,8% con precision=14)"""
+    m = 1 << precision
+    registro = (huellas >> np.uint64(64 - precision)).astype(np.int64)
+    resto = huellas << np.uint64(precision)
+    # Ceros a la izquierda del resto + 1, a partir del exponente en punto flotante
+    _, exponente = np.frexp(resto.astype(np.float64))
+    rango = np.clip(65 - exponente, 1, 64 - precision + 1).astype(np.int8)
+    registros = np.zeros(m, dtype=np.int8)
+    np.maximum.at(registros, registro, rango)
+
+    estimado = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.ldexp(1.0, -registros.astype(np.int64)))
+    vacios = np.count_nonzero(registros == 0)
+    if estimado <= 2.5 * m and vacios > 0:
+        estimado = m * np.log(m / vacios)
+    return int(round(estimado))
+
+
+def _leer_excel_por_bloques(ruta: str, tamaño_bloque: int, hoja: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Lee un .xlsx fila a fila (openpyxl en modo solo lectura) y lo entrega en bloques"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Leer Excel por bloques requiere openpyxl: pip install openpyxl")
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = (libro[hoja] if hoja else libro.active).iter_rows(values_only=True)
+        encabezado = list(next(filas, ()))
+        while True:
+            bloque = list(itertools.islice(filas, tamaño_bloque))
+            if not bloque:
+                break
+            yield pd.DataFrame(bloque, columns=encabezado, dtype=object)
+    finally:
+        libro.close()
+
+
+def _escribir_parquet(bloque: pd.DataFrame, salida: str, escritor=None):
+    """Agrega un bloque al Parquet de salida; el primer bloque fija el esquema del archivo"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Escribir Parquet por bloques requiere pyarrow: pip install pyarrow")
+    if escritor is None:
+        tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+        escritor = pq.ParquetWriter(salida, tabla.schema)
+    else:
+        tabla = pa.Table.from_pandas(bloque, schema=escritor.schema, preserve_index=False)
+    escritor.write_table(tabla)
+    return escritor
+
+
+def _ensanchar_parquet(escritor, ruta: str, columnas: List[str]):
+    """
+    Cierra el Parquet a medio escribir y lo copia, con `columnas` pasadas a
+    float64, a un archivo nuevo que queda abierto para seguir agregando.
+    Devuelve (escritor, ruta del archivo nuevo); el anterior se borra
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    escritor.close()
+    esquema = escritor.schema.remove_metadata()
+    for col in columnas:
+        esquema = esquema.set(esquema.get_field_index(col), pa.field(col, pa.float64()))
+    descriptor, nueva = tempfile.mkstemp(suffix=os.path.splitext(ruta)[1], dir=os.path.dirname(ruta))
+    os.close(descriptor)
+    nuevo = pq.ParquetWriter(nueva, esquema)
+    try:
+        for lote in pq.ParquetFile(ruta).iter_batches():
+            nuevo.write_table(pa.Table.from_batches([lote]).cast(esquema))
+    except BaseException:
+        nuevo.close()
+        os.remove(nueva)
+        raise
+    os.remove(ruta)
+    return nuevo, nueva
+
+
+def _nombre_columna(col: str) -> str:
+    """Nombre de columna en mayúsculas, con espacios como guiones bajos y sin puntos"""
+    return col.upper().replace(" ", "_").replace(".", "")
+
+
+def _verificar_estricto(serie: pd.Series, convertida: pd.Series, tipo: str) -> None:
+    """Error si la conversión estricta dejó nulo un valor no vacío de la columna"""
+    perdidos = serie[convertida.isna().to_numpy() & serie.notna().to_numpy()]
+    perdidos = perdidos[perdidos.astype(str).str.strip() != ""]
+    if len(perdidos):
+        raise ValueError(f"La columna {serie.name} es de {tipo} en el esquema pero trae {perdidos.iloc[0]!r}")
+
+
+def _ultima_posicion(mascara: np.ndarray) -> np.ndarray:
+    # Índice de la última columna True de cada fila (-1 si no hay)
+    invertida = mascara[:, ::-1]
+    return np.where(invertida.any(axis=1), mascara.shape[1] - 1 - invertida.argmax(axis=1), -1)
+
+def _limpiar_textos(textos: List[str]) -> np.ndarray:
+    # Los textos se limpian por tramos de largo (hasta 8, 16, 32 y 64
+    # caracteres) para que la matriz de cada tramo no tome el ancho del texto
+    # más largo de la columna; los de más de _ANCHO_LIMPIEZA van por limpiar_valor
+    resultado = np.empty(len(textos), dtype=object)
+    if len(textos) == 0:
+        return resultado
+    largos = np.fromiter(map(len, textos), dtype=np.int64, count=len(textos))
+    tramos = np.maximum(np.ceil(np.log2(np.maximum(largos, 1))), 3).astype(np.int64)
+    for tramo in np.unique(tramos).tolist():
+        filas = np.flatnonzero(tramos == tramo)
+        if 2 ** tramo > _ANCHO_LIMPIEZA:
+            resultado[filas] = [DataProcessor.limpiar_valor(textos[fila]) for fila in filas]
+        else:
+            resultado[filas] = _limpiar_matriz([textos[fila] for fila in filas], 2 ** tramo)
+    return resultado
+
+def _limpiar_matriz(textos: List[str], ancho: int) -> np.ndarray:
+    # Limpieza de limpiar_valor hecha sobre una matriz de caracteres (una fila
+    # por texto, `ancho` columnas): se quitan los caracteres no numéricos, se
+    # aplican las reglas de coma decimal / miles con punto y se compactan los
+    # que quedan
+    codigos = np.asarray(textos, dtype=f"<U{ancho}").view(np.uint32).reshape(len(textos), ancho)
+    no_ascii = np.flatnonzero((codigos > 127).any(axis=1))
+    letras = codigos.astype(np.uint8)
+    coma, punto = letras == ord(","), letras == ord(".")
+    conservar = ((letras >= ord("0")) & (letras <= ord("9"))) | coma | punto | (letras == ord("-"))
+
+    comas, puntos = coma.sum(axis=1), punto.sum(axis=1)
+    coma_decimal = (comas == 1) & (puntos == 0)
+    miles = (comas == 1) & (puntos >= 1) & (_ultima_posicion(punto) < _ultima_posicion(coma))
+    conservar &= ~(punto & miles[:, None])
+
+    # Los caracteres conservados se corren a la izquierda (tantas posiciones
+    # como caracteres quitados antes que ellos); el resto queda en 0
+    quitados = np.arange(1, ancho + 1, dtype=np.int16) - np.cumsum(conservar, axis=1, dtype=np.int16)
+    indices = np.flatnonzero(conservar)
+    valores = letras.ravel()[indices]
+    valores[(valores == ord(",")) & np.repeat(coma_decimal | miles, conservar.sum(axis=1))] = ord(".")
+    limpias = np.zeros(codigos.size, dtype=np.uint32)
+    limpias[indices - quitados.ravel()[indices]] = valores
+    resultado = limpias.view(f"<U{ancho}").astype(object)
+
+    # Dígitos no ASCII (que \d sí reconoce) se dejan a la versión por valor
+    for fila in no_ascii:
+        resultado[fila] = DataProcessor.limpiar_valor(textos[fila])
+    return resultado
+
 
 class DataProcessor:
     """Clase para procesar y manipular DataFrames"""
@@ -86,6 +290,18 @@ class DataProcessor:
 
         return valor
 
+    @staticmethod
+    def limpiar_columna(serie: pd.Series) -> pd.Series:
+        """
+        Versión vectorizada de limpiar_valor sobre una columna completa
+        ("1.234,56", "1234,5", "$ 1.000", ...); los nulos quedan como NaN
+        """
+        nulos = serie.isna().values
+        codigos, unicos = pd.factorize(serie.values[~nulos])
+        limpia = np.full(len(serie), np.nan, dtype=object)
+        limpia[~nulos] = _limpiar_textos([str(valor) for valor in unicos])[codigos]
+        return pd.Series(limpia, index=serie.index, name=serie.name)
+
     @staticmethod
     def convertir_valores(valor: Any) -> Union[bool, int, float, Any]:
         """
@@ -107,62 +323,269 @@ class DataProcessor:
                 return valor
 
     @staticmethod
-    def convertir_columnas(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+    def muestra_columna(serie: pd.Series, tamaño: int = 10000) -> pd.Series:
+        """
+        Muestra acotada de los valores no nulos de una columna, repartida a lo
+        largo de toda la tabla (no solo el inicio)
+        """
+        validos = serie.dropna()
+        if len(validos) <= tamaño:
+            return validos
+        return validos.iloc[np.linspace(0, len(validos) - 1, tamaño).astype(np.int64)]
+
+    @staticmethod
+    def inferir_tipo(serie: pd.Series) -> str:
         """
-        Convierte automáticamente las columnas del DataFrame a sus tipos apropiados
+        Decide el tipo de una columna: "fechas", "booleanas", "enteros", "decimales" o "texto"
         """
-        df = df.copy()
+        validos = len(serie.dropna())
+
+        # 1. Intentar fecha
+        # (en pandas 3 read_csv deja el texto con dtype str, no object)
+        if serie.dtype == "object" or is_string_dtype(serie) or is_datetime64_any_dtype(serie):
+            if DataProcessor.convertir_fechas(serie) is not None:
+                return "fechas"
+
+        # 2. Limpieza básica si es texto
+        if serie.dtype == "object" or pd.api.types.is_string_dtype(serie):
+            serie = DataProcessor.limpiar_columna(serie)
+
+        # 3. Intentar booleano
+        valores_unicos = pd.Series(serie.dropna().unique(), dtype=object)
+        if valores_unicos.astype(str).str.strip().str.lower().isin(_VALORES_BOOLEANOS).all():
+            return "booleanas"
+
+        # 4. Intentar numérico
+        num = pd.to_numeric(serie, errors="coerce")
+        if num.notna().sum() >= validos * 0.9 and validos > 0:
+            return "enteros" if (num.dropna() % 1 == 0).all() else "decimales"
+
+        # 5. Dejar como texto
+        return "texto"
+
+    @staticmethod
+    def detectar_formato_fecha(serie: pd.Series, muestra: int = 200) -> Optional[str]:
+        """
+        Detecta sobre una muestra el formato de fecha de la columna: un formato
+        explícito, "excel" para seriales de Excel (solo si el nombre de la columna
+        habla de fecha) o "inferido". Devuelve None si no parece fecha.
+        """
+        textos = DataProcessor.muestra_columna(serie, muestra).astype(str).str.strip()
+        if len(textos) == 0:
+            return None
+
+        # "fecha" o "date" como palabra del nombre, no dentro de otra ("updated")
+        palabras = {palabra.lower() for palabra in _PATRON_PALABRAS.findall(str(serie.name))}
+        if palabras & {"fecha", "date"}:
+            serial = pd.to_numeric(textos, errors="coerce")
+            if serial.between(20000, 80000).mean() >= 0.9:
+                return _FECHA_EXCEL
+
+        # Descarte barato: la mayoría debe empezar como d-m-a o a-m-d
+        if textos.str.match(_PATRON_FECHA).mean() < 0.9:
+            return None
+        for formato in _FORMATOS_FECHA:
+            if pd.to_datetime(textos, format=formato, errors="coerce").notna().mean() >= 0.9:
+                return formato
+        return _FECHA_INFERIDA
+
+    @staticmethod
+    def parsear_fechas(serie: pd.Series, formato: str) -> pd.Series:
+        """
+        Convierte la columna a fechas con el formato indicado. Si hay muchas
+        fechas repetidas se parsean solo los valores distintos
+        """
+        codigos, unicos = pd.factorize(serie)
+        if len(unicos) < len(serie) // 2:
+            fechas = DataProcessor.parsear_fechas(pd.Series(unicos, dtype=serie.dtype), formato)
+            valores = fechas.values.take(codigos)
+            valores[codigos < 0] = np.datetime64("NaT")
+            return pd.Series(valores, index=serie.index, name=serie.name)
+        if formato == _FECHA_EXCEL:
+            return pd.to_datetime(pd.to_numeric(serie, errors="coerce"), unit="D", origin="1899-12-30")
+        if formato == _FECHA_INFERIDA:
+            return pd.to_datetime(serie, errors="coerce", dayfirst=True)
+        return pd.to_datetime(serie, format=formato, errors="coerce")
+
+    @staticmethod
+    def convertir_fechas(serie: pd.Series) -> Optional[pd.Series]:
+        """
+        Convierte la columna a fechas si al menos el 90% de sus valores lo son;
+        si no, devuelve None. El formato se guarda por nombre de columna y se
+        prueba primero en la siguiente llamada.
+        """
+        validos = serie.notna().sum()
+        if validos == 0:
+            return None
+        if is_datetime64_any_dtype(serie):
+            return serie
+
+        formato = _formatos_fecha.get(serie.name)
+        if formato is not None:
+            fecha = DataProcessor.parsear_fechas(serie, formato)
+            if fecha.notna().sum() >= validos * 0.9:
+                return fecha
+
+        nuevo = DataProcessor.detectar_formato_fecha(serie)
+        if nuevo is None or nuevo == formato:
+            return None
+        fecha = DataProcessor.parsear_fechas(serie, nuevo)
+        if fecha.notna().sum() < validos * 0.9:
+            return None
+        _formatos_fecha[serie.name] = nuevo
+        return fecha
+
+    @staticmethod
+    def convertir_serie(serie: pd.Series, tipo: str, estricto: bool = False) -> Optional[Tuple[pd.Series, str]]:
+        """
+        Convierte la columna completa al tipo indicado y verifica que el tipo
+        siga valiendo; devuelve (serie convertida, tipo) o None si no cumple.
+        Con estricto=True el tipo se impone sin volver a inferirlo: un entero
+        con decimales pasa a decimales (no se pierde nada) y cualquier otro
+        valor que no calza (p. ej. texto en una columna numérica) es un error,
+        para no perderlo
+        """
+        validos = len(serie.dropna())
+        if tipo == "fechas":
+            fecha = DataProcessor.convertir_fechas(serie)
+            if estricto:
+                if fecha is None:
+                    fecha = DataProcessor.parsear_fechas(serie, _formatos_fecha.get(serie.name, _FECHA_INFERIDA))
+                _verificar_estricto(serie, fecha, tipo)
+            return None if fecha is None else (fecha, tipo)
+
+        if tipo == "texto":
+            return serie.astype("string"), tipo
+
+        limpia = serie
+        if serie.dtype == "object" or pd.api.types.is_string_dtype(serie):
+            limpia = DataProcessor.limpiar_columna(serie)
+
+        if tipo == "booleanas":
+            valores_unicos = pd.Series(limpia.dropna().unique(), dtype=object)
+            booleanos = valores_unicos.astype(str).str.strip().str.lower().isin(_VALORES_BOOLEANOS)
+            if not (booleanos.all() or estricto):
+                return None
+            mapa = {valor: DataProcessor.convertir_valores(valor) for valor in valores_unicos[booleanos]}
+            convertida = limpia.map(mapa)
+            if estricto:
+                _verificar_estricto(serie, convertida, tipo)
+            return convertida, tipo
+
+        num = pd.to_numeric(limpia, errors="coerce")
+        if estricto:
+            _verificar_estricto(serie, num, tipo)
+            if tipo == "decimales" or not (num.dropna() % 1 == 0).all():
+                return num.astype("float64"), "decimales"
+            return num.astype("Int64"), tipo
+        if not (num.notna().sum() >= validos * 0.9 and validos > 0):
+            return None
+        if (num.dropna() % 1 == 0).all():
+            return num.astype("Int64"), "enteros"  # Soporta NaN en enteros
+        return num, "decimales"
+
+    @staticmethod
+    def convertir_columnas(df: pd.DataFrame, esquema: Optional[Dict[str, Any]] = None,
+                           muestra: int = 10000, estricto: bool = False, copiar: bool = True,
+                           compacto: bool = False) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+        """
+        Convierte automáticamente las columnas del DataFrame a sus tipos apropiados.
+        El tipo se infiere sobre una muestra de `muestra` valores y luego se
+        convierte la columna completa una sola vez; si la columna completa no
+        cumple el tipo, se infiere de nuevo con todos sus valores. Con `esquema`
+        (las conversiones de una corrida anterior) no se infiere nada para las
+        columnas que ya trae, y con estricto=True se les impone ese tipo.
+        Con copiar=False las columnas se reemplazan en el mismo DataFrame.
+        Con compacto=True cada columna pasa además por compactar_serie y
+        conversiones["bytes_ahorrados"] trae lo ahorrado por columna
+        """
+        if copiar:
+            df = df.copy()
         conversiones = { "fechas": [], "booleanas": [], "texto": [],"decimales": []}
+        conocidos = {}
+        for tipo, columnas in (esquema or {}).items():
+            if tipo in _TIPOS_ESQUEMA:
+                conocidos.update({col: tipo for col in columnas})
+        _formatos_fecha.update((esquema or {}).get("formatos_fecha", {}))
 
         for col in df.columns:
             serie = df[col]
+            tipo = conocidos.get(col)
+            if tipo is None:
+                tipo = DataProcessor.inferir_tipo(DataProcessor.muestra_columna(serie, muestra))
+            convertida = DataProcessor.convertir_serie(serie, tipo, estricto and col in conocidos)
+            if convertida is None:
+                convertida = DataProcessor.convertir_serie(serie, DataProcessor.inferir_tipo(serie))
+            df[col], tipo = convertida
+            conversiones.setdefault(tipo, []).append(col)
+            if compacto:
+                antes = df[col].memory_usage(index=False, deep=True)
+                df[col] = DataProcessor.compactar_serie(df[col], tipo)
+                ahorro = conversiones.setdefault("bytes_ahorrados", {})
+                ahorro[col] = int(antes - df[col].memory_usage(index=False, deep=True))
 
-            # 4. Intentar fecha
-            if serie.dtype == "object" or pd.api.types.is_datetime64_dtype(serie):
-                fecha = pd.to_datetime(serie, errors="coerce", dayfirst=True)
-                if fecha.notna().sum() >= len(serie.dropna()) * 0.9 and len(serie.dropna()) > 0:
-                    df[col] = fecha
-                    conversiones["fechas"].append(col)
-                    continue
-
-            # 1. Limpieza básica si es texto
-            if serie.dtype == "object" or pd.api.types.is_string_dtype(serie):
-                serie = serie.map(DataProcessor.limpiar_valor)
-
-            # 2. Intentar booleano
-            valores_unicos = set(str(x).strip().lower() for x in serie.dropna().unique())
-            if valores_unicos.issubset({"true", "false", "sí", "si", "no", "verdadero", "falso", "1", "0"}):
-                df[col] = serie.map(DataProcessor.convertir_valores)
-                conversiones["booleanas"].append(col)
-                continue
+        return df, conversiones
 
-            # 3. Intentar numérico
-            num = pd.to_numeric(serie, errors="coerce")
-            if num.notna().sum() >= len(serie.dropna()) * 0.9 and len(serie.dropna()) > 0:
-                es_entero = (num.dropna() % 1 == 0).all()
-                if es_entero:
-                    df[col] = num.astype("Int64")  # Soporta NaN en enteros
-                    conversiones.setdefault("enteros", []).append(col)
-                else:
-                    df[col] = num
-                    conversiones["decimales"].append(col)
-                continue
+    @staticmethod
+    def compactar_serie(serie: pd.Series, tipo: str) -> pd.Series:
+        """
+        Versión de menor memoria de una columna ya convertida: enteros al ancho
+        mínimo que cabe (Int8/Int16/Int32), decimales a float32 si no pierden
+        precisión, y texto a category si tiene pocos valores distintos (o a
+        texto Arrow si pyarrow está instalado)
+        """
+        if tipo == "enteros" and serie.notna().any():
+            minimo, maximo = serie.min(), serie.max()
+            for ancho in ("Int8", "Int16", "Int32"):
+                limites = np.iinfo(ancho.lower())
+                if limites.min <= minimo and maximo <= limites.max:
+                    return serie.astype(ancho)
+        elif tipo == "decimales" and serie.dtype == np.float64:
+            reducida = serie.astype(np.float32)
+            if np.array_equal(reducida.values.astype(np.float64), serie.values, equal_nan=True):
+                return reducida
+        elif tipo == "texto" and len(serie):
+            if serie.nunique() <= len(serie) * _PROPORCION_CATEGORIA:
+                return serie.astype("category")
+            if _HAY_PYARROW:
+                return serie.astype(pd.StringDtype("pyarrow"))
+        return serie
 
-            # 5. Dejar como texto
-            df[col] = df[col].astype("string")
-            conversiones["texto"].append(col)
+    @staticmethod
+    def crear_esquema(df: pd.DataFrame, conversiones: Dict[str, List[str]]) -> Dict[str, Any]:
+        """
+        Esquema reutilizable: las conversiones, el dtype final de cada columna y
+        el formato de las columnas de fecha
+        """
+        esquema = {tipo: list(columnas) for tipo, columnas in conversiones.items() if tipo in _TIPOS_ESQUEMA}
+        esquema["tipos"] = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
+        esquema["formatos_fecha"] = {
+            str(col): _formatos_fecha[col] for col in conversiones.get("fechas", []) if col in _formatos_fecha
+        }
+        return esquema
 
-        return df, conversiones
+    @staticmethod
+    def guardar_esquema(esquema: Dict[str, Any], ruta: str) -> None:
+        """
+        Guarda un esquema (conversiones + tipos) como JSON
+        """
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(esquema, archivo, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def cargar_esquema(ruta: str) -> Dict[str, Any]:
+        """
+        Lee un esquema guardado con guardar_esquema
+        """
+        with open(ruta, encoding="utf-8") as archivo:
+            return json.load(archivo)
 
     @staticmethod
     def renombrar_columnas(df: pd.DataFrame) -> pd.DataFrame:
         """
         Convierte nombres de columnas a mayúsculas y reemplaza espacios y puntos por guiones bajos
         """
-        columnas = df.columns
-        columnas = [col.upper() for col in columnas]
-        columnas = [col.replace(" ", "_").replace(".", "") for col in columnas]
-        df.columns = columnas
+        df.columns = [_nombre_columna(col) for col in df.columns]
         return df
 
     @staticmethod
@@ -180,35 +603,107 @@ class DataProcessor:
     def resumen_columnas(tabla: pd.DataFrame) -> pd.DataFrame:
         """
         Genera resumen estadístico de cada columna del DataFrame
+        (Cantidad = valores distintos no nulos, Suma = suma de los distintos)
         """
-        Resumen = pd.DataFrame(columns=["Columna", "Cantidad","Suma", "Elementos"])
-        for x in tabla.columns:
+        Resumen = DataProcessor.perfil_columnas(tabla, elementos=True)
+        return Resumen[["Columna", "Cantidad", "Suma", "Elementos", "Tipo"]]
+
+    @staticmethod
+    def huella_filas(tabla: pd.DataFrame) -> np.ndarray:
+        """
+        Hash de 64 bits de cada fila. Los números se comparan por valor (5 y 5.0
+        son iguales, los enteros grandes sin redondear), las fechas por su
+        instante y el resto como texto sin espacios al borde y en minúsculas,
+        igual que la Key de texto
+        """
+        huellas = {}
+        for posicion, col in enumerate(tabla.columns):
+            serie = tabla.iloc[:, posicion]
+            if is_numeric_dtype(serie) and not is_bool_dtype(serie):
+                huellas[posicion] = _huella_numeros(serie)
+            elif is_datetime64_any_dtype(serie):
+                huellas[posicion] = pd.util.hash_pandas_object(serie, index=False).values
+            else:
+                texto = serie.astype(str).str.strip().str.lower()
+                huellas[posicion] = pd.util.hash_pandas_object(texto, index=False).values
+        return pd.util.hash_pandas_object(pd.DataFrame(huellas, index=tabla.index), index=False).values
+
+    @staticmethod
+    def perfil_columna(serie: pd.Series, aproximado: bool = False, elementos: bool = False) -> Dict[str, Any]:
+        """
+        Perfil de una columna en una pasada: filas, nulos, distintos (Cantidad),
+        suma de los distintos (Suma), suma total, mínimo y máximo
+        """
+        nulos = int(serie.isna().sum())
+        numerica = is_numeric_dtype(serie) and not pd.api.types.is_complex_dtype(serie)
+        perfil = {"Columna": serie.name, "Filas": len(serie), "Nulos": nulos}
+
+        if aproximado:
+            validos = serie.dropna()
+            huellas = pd.util.hash_pandas_object(validos, index=False).values
+            perfil["Cantidad"] = _distintos_aproximados(huellas) if len(validos) else 0
+            perfil["Suma"] = np.nan
+            unicos = validos
+        else:
+            _, unicos = pd.factorize(serie, use_na_sentinel=True)
+            unicos = pd.Series(unicos)
+            perfil["Cantidad"] = len(unicos)
+            perfil["Suma"] = unicos.sum() if numerica else 0
+
+        perfil["Total"] = serie.sum() if numerica else 0
+        try:
+            perfil["Minimo"], perfil["Maximo"] = unicos.min(), unicos.max()
+        except TypeError:
+            # Columnas con tipos mezclados no tienen orden
+            perfil["Minimo"], perfil["Maximo"] = None, None
+        if elementos:
             try:
-                elemento, cantidad = np.unique(tabla[x].values, return_counts=True)
-                try:
-                    Resumen.loc[len(Resumen)] = [x, len(elemento),int(elemento.sum()),elemento]
-                except:
-                    Resumen.loc[len(Resumen)] = [x, len(elemento),0,elemento]
-            except:
-                Resumen.loc[len(Resumen)] = [x, 0,0, "Error"]
-                
-        tipo = tabla.dtypes.reset_index().rename(columns={0:"Tipo","index":"Columna"})
-        Resumen = Resumen.merge(tipo,on="Columna",how="left")
-        
-        return Resumen.sort_values("Cantidad", ascending=False)
+                perfil["Elementos"] = np.sort(unicos.values)
+            except TypeError:
+                perfil["Elementos"] = unicos.values
+        perfil["Tipo"] = serie.dtype
+        return perfil
 
     @staticmethod
-    def añadir_key_and_indice(tabla: pd.DataFrame, columna: str = "Key", Key: bool = True, Indice: bool = False, excepciones: List[str] = []) -> pd.DataFrame:
+    def perfil_columnas(tabla: pd.DataFrame, procesos: Optional[int] = None, aproximado: bool = False,
+                        elementos: bool = False) -> pd.DataFrame:
         """
-        Añade columna clave combinando valores de columnas y opcionalmente índice secuencial
+        Perfil de todas las columnas, calculadas en paralelo en un pool de hilos.
+        Con aproximado=True los distintos se estiman con HyperLogLog (para tablas
+        muy grandes) y Suma queda vacía. Con elementos=True se agregan los
+        valores distintos de cada columna
         """
-        tabla = tabla.copy()
+        columnas = [tabla.iloc[:, posicion] for posicion in range(tabla.shape[1])]
+        with ThreadPoolExecutor(max_workers=procesos) as pool:
+            perfiles = list(pool.map(
+                lambda serie: DataProcessor.perfil_columna(serie, aproximado, elementos), columnas
+            ))
+        orden = ["Columna", "Filas", "Nulos", "Cantidad", "Suma", "Total", "Minimo", "Maximo"]
+        orden += ["Elementos", "Tipo"] if elementos else ["Tipo"]
+        Resumen = pd.DataFrame(perfiles, columns=orden)
+        return Resumen.sort_values("Cantidad", ascending=False, kind="stable")
+
+    @staticmethod
+    def añadir_key_and_indice(tabla: pd.DataFrame, columna: str = "Key", Key: bool = True, Indice: bool = False, excepciones: List[str] = [],
+                              huella: bool = False, copiar: bool = True) -> pd.DataFrame:
+        """
+        Añade columna clave combinando valores de columnas y opcionalmente índice secuencial.
+        Con huella=True la clave es un hash uint64 de la fila y `{columna}2` es
+        el número de ocurrencia (entero) en vez del texto "ocurrencia-clave"
+        """
+        if copiar:
+            tabla = tabla.copy()
         if Key:
             columnas_combinadas = [col for col in tabla.columns if col not in excepciones]
-            tabla[columna] = tabla[columnas_combinadas].apply(lambda row: ' '.join(row.astype(str)), axis=1)
-            tabla[columna] = tabla[columna].str.strip().str.lower()
+            if huella:
+                tabla[columna] = DataProcessor.huella_filas(tabla[columnas_combinadas])
+            else:
+                tabla[columna] = tabla[columnas_combinadas].apply(lambda row: ' '.join(row.astype(str)), axis=1)
+                tabla[columna] = tabla[columna].str.strip().str.lower()
 
-        if Indice:
+        if Indice and huella:
+            tabla[f"{columna}2"] = tabla.groupby(columna).cumcount() + 1
+        elif Indice:
             tabla["Indice"] = tabla.groupby(columna).cumcount() + 1
             new_col = f"{columna}2"
             tabla[new_col] = tabla["Indice"].astype(str) + "-" + tabla[columna]
@@ -217,7 +712,7 @@ class DataProcessor:
         return tabla
 
     @staticmethod
-    def nuevo_registros(Tabla_nueva: pd.DataFrame, Tabla_antigua: pd.DataFrame) -> Optional[pd.DataFrame]:
+    def nuevo_registros(Tabla_nueva: pd.DataFrame, Tabla_antigua: pd.DataFrame, huella: bool = False) -> Optional[pd.DataFrame]:
         """
         Identifica registros nuevos comparando dos DataFrames con misma estructura
         """
@@ -225,9 +720,12 @@ class DataProcessor:
         col_original = Tabla_antigua.columns.values
 
         if len(col_nueva) == len(col_original):
-            tab_nueva = DataProcessor.añadir_key_and_indice(Tabla_nueva, Indice=True)
-            tab_original = DataProcessor.añadir_key_and_indice(Tabla_antigua, Indice=True)
-            
+            tab_nueva = DataProcessor.añadir_key_and_indice(Tabla_nueva, Indice=True, huella=huella)
+            tab_original = DataProcessor.añadir_key_and_indice(Tabla_antigua, Indice=True, huella=huella)
+            if huella:
+                nuevos = ~_presentes(tab_nueva["Key"].values, tab_original["Key"].values)
+                return tab_nueva.loc[nuevos, col_nueva].reset_index(drop=True)
+
             l = DataProcessor.comunes(tab_nueva["Key2"], tab_original["Key2"]).rename(columns={"Key": "Key2"})
             new = l[l["Regla"] == "L1"].merge(tab_nueva, on="Key2", how="left")
             return new[col_nueva]
@@ -236,26 +734,38 @@ class DataProcessor:
             return None
 
     @staticmethod
-    def cruzar_registro(original: pd.DataFrame, nuevo: pd.DataFrame, excepciones: List[str] = [], method: str = "nuevos") -> pd.DataFrame:
+    def cruzar_registro(original: pd.DataFrame, nuevo: pd.DataFrame, excepciones: List[str] = [], method: str = "nuevos",
+                        huella: bool = False) -> pd.DataFrame:
         """
-        Cruza registros entre DataFrames para encontrar nuevos o iguales
+        Cruza registros entre DataFrames para encontrar nuevos o iguales.
+        Con huella=True no se transforman enteros ni fechas: la huella ya compara
+        números por valor y las filas se devuelven con sus tipos originales
         """
         columna_original = original.columns
         columna_nuevo = nuevo.columns
         
-        original = original.apply(lambda x: x.astype(int) if pd.api.types.is_float_dtype(x) and (x % 1 == 0).all() else x)
-        nuevo = nuevo.apply(lambda x: x.astype(int) if pd.api.types.is_float_dtype(x) and (x % 1 == 0).all() else x)
+        if not huella:
+            original = original.apply(lambda x: x.astype(int) if pd.api.types.is_float_dtype(x) and (x % 1 == 0).all() else x)
+            nuevo = nuevo.apply(lambda x: x.astype(int) if pd.api.types.is_float_dtype(x) and (x % 1 == 0).all() else x)
 
-        original = original.apply(lambda x: x.dt.strftime('%d-%m-%Y') if pd.api.types.is_datetime64_dtype(x) else x)
-        nuevo = nuevo.apply(lambda x: x.dt.strftime('%d-%m-%Y') if pd.api.types.is_datetime64_dtype(x) else x)
+            original = original.apply(lambda x: x.dt.strftime('%d-%m-%Y') if pd.api.types.is_datetime64_dtype(x) else x)
+            nuevo = nuevo.apply(lambda x: x.dt.strftime('%d-%m-%Y') if pd.api.types.is_datetime64_dtype(x) else x)
         
         columns = DataProcessor.comunes(columna_original,columna_nuevo)
         excepciones = list(columns[columns["Regla"]!="OK"]["Key"].values)+excepciones
         columnas_final = columns[columns["Regla"]=="OK"]["Key"].values
         
         if len(original)>0:
-            original_key = DataProcessor.añadir_key_and_indice(original,Indice=True,excepciones=excepciones)
-            nuevo_key = DataProcessor.añadir_key_and_indice(nuevo,Indice=True,excepciones=excepciones)
+            original_key = DataProcessor.añadir_key_and_indice(original,Indice=True,excepciones=excepciones,huella=huella)
+            nuevo_key = DataProcessor.añadir_key_and_indice(nuevo,Indice=True,excepciones=excepciones,huella=huella)
+            if huella:
+                presentes = _presentes(nuevo_key["Key"].values, original_key["Key"].values)
+                seleccion = ~presentes if method == "nuevos" else presentes
+                if seleccion.any():
+                    return nuevo_key[seleccion].drop(columns=["Key","Key2"]).reset_index(drop=True)
+                print("Error registros sin movimientos")
+                return DataProcessor.comunes(list(zip(original_key["Key"], original_key["Key2"])),
+                                             list(zip(nuevo_key["Key"], nuevo_key["Key2"])))
             cruze = DataProcessor.comunes(original_key["Key2"],nuevo_key["Key2"])
             if method == "nuevos":
                 registros = cruze[cruze["Regla"]=="L2"]
@@ -273,17 +783,77 @@ class DataProcessor:
             return nuevo 
 
     @staticmethod
-    def rellenar_vacios(df: pd.DataFrame) -> pd.DataFrame:
+    def guardar_indice(huellas: np.ndarray, ruta: str) -> None:
+        """
+        Guarda las huellas de una tabla (en orden de fila) como .npy o .parquet
+        """
+        if str(ruta).lower().endswith(".parquet"):
+            pd.DataFrame({"Huella": huellas}).to_parquet(ruta, index=False)
+        else:
+            with open(ruta, "wb") as archivo:
+                np.save(archivo, np.asarray(huellas, dtype=np.uint64))
+
+    @staticmethod
+    def cargar_indice(ruta: str) -> np.ndarray:
         """
-        Rellena valores vacíos del DataFrame según el tipo de dato de cada columna
+        Lee un índice de huellas guardado con guardar_indice; vacío si no existe
         """
-        df = df.copy()
+        if not os.path.exists(ruta):
+            return np.zeros(0, dtype=np.uint64)
+        if str(ruta).lower().endswith(".parquet"):
+            return pd.read_parquet(ruta)["Huella"].values.astype(np.uint64)
+        return np.load(ruta)
+
+    @staticmethod
+    def diferencias_registros(nuevo: pd.DataFrame, anterior: Union[pd.DataFrame, np.ndarray, str, None] = None,
+                              excepciones: List[str] = [], guardar: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Compara una tabla con la foto anterior por huellas de fila (ver huella_filas).
+        `anterior` puede ser la tabla anterior, su arreglo de huellas o la ruta de
+        un índice guardado. Devuelve {"nuevos", "iguales", "eliminados"}; los
+        nuevos e iguales conservan el índice de `nuevo`, y los eliminados son
+        filas de la tabla anterior o, si solo se tiene el índice, su posición
+        ("Fila") y "Huella". Con `guardar` se escribe el índice de `nuevo` para
+        la próxima corrida, así cada corrida solo calcula huellas del archivo nuevo.
+        """
+        columnas = [col for col in nuevo.columns if col not in excepciones]
+        huellas = DataProcessor.huella_filas(nuevo[columnas])
+        if isinstance(anterior, pd.DataFrame):
+            previas = DataProcessor.huella_filas(anterior[columnas])
+        elif anterior is None:
+            previas = np.zeros(0, dtype=np.uint64)
+        elif isinstance(anterior, np.ndarray):
+            previas = anterior
+        else:
+            previas = DataProcessor.cargar_indice(anterior)
+
+        presentes = _presentes(huellas, previas)
+        eliminados = np.flatnonzero(~_presentes(previas, huellas))
+        if isinstance(anterior, pd.DataFrame):
+            tabla_eliminados = anterior.iloc[eliminados]
+        else:
+            tabla_eliminados = pd.DataFrame({"Fila": eliminados, "Huella": previas[eliminados]})
+
+        if guardar is not None:
+            DataProcessor.guardar_indice(huellas, guardar)
+        return {"nuevos": nuevo[~presentes], "iguales": nuevo[presentes], "eliminados": tabla_eliminados}
+
+    @staticmethod
+    def rellenar_vacios(df: pd.DataFrame, esquema: Optional[Dict[str, Any]] = None, estricto: bool = False,
+                        copiar: bool = True) -> pd.DataFrame:
+        """
+        Rellena valores vacíos del DataFrame según el tipo de dato de cada columna.
+        Con `esquema` se reutilizan los tipos ya detectados en vez de inferirlos
+        (ver convertir_columnas para `estricto`)
+        """
+        if copiar:
+            df = df.copy()
 
         # Reemplaza strings vacíos explícitamente con NaN
         df.replace("", pd.NA, inplace=True)
 
         # Detecta tipos reales antes de rellenar
-        df, _ = DataProcessor.convertir_columnas(df)
+        df, _ = DataProcessor.convertir_columnas(df, esquema, estricto=estricto, copiar=False)
 
         for col in df.columns:
             serie = df[col]
@@ -316,6 +886,118 @@ class DataProcessor:
         else:
             return Tabla.groupby([Agrup]).agg(can=(Agrup,"count")).reset_index()
 
+    @staticmethod
+    def leer_por_bloques(origen: Any, tamaño_bloque: int = 100000, **opciones) -> Iterator[pd.DataFrame]:
+        """
+        Entrega un origen de datos en bloques de `tamaño_bloque` filas: la ruta
+        de un CSV, Parquet o Excel (.xlsx), un DataFrame o cualquier iterable de
+        DataFrames. `opciones` se entregan a pd.read_csv (sep, encoding, dtype, ...)
+        o, para Excel, `hoja` elige la hoja
+        """
+        if isinstance(origen, pd.DataFrame):
+            for inicio in range(0, len(origen), tamaño_bloque):
+                yield origen.iloc[inicio:inicio + tamaño_bloque]
+            return
+        if not isinstance(origen, (str, os.PathLike)):
+            yield from origen
+            return
+
+        extension = os.path.splitext(str(origen))[1].lower()
+        if extension == ".parquet":
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Leer Parquet por bloques requiere pyarrow: pip install pyarrow")
+            for lote in pq.ParquetFile(origen).iter_batches(batch_size=tamaño_bloque):
+                yield lote.to_pandas()
+        elif extension in (".xlsx", ".xlsm"):
+            yield from _leer_excel_por_bloques(origen, tamaño_bloque, opciones.get("hoja"))
+        else:
+            yield from pd.read_csv(origen, chunksize=tamaño_bloque, **opciones)
+
+    @staticmethod
+    def procesar_por_bloques(origen: Union[str, pd.DataFrame], salida: Optional[str] = None, Agrup: Optional[str] = None,
+                             Suma: Optional[str] = None, tamaño_bloque: int = 100000,
+                             esquema: Optional[Dict[str, Any]] = None, muestra: int = 10000, **opciones) -> Dict[str, Any]:
+        """
+        Aplica rellenar_vacios bloque a bloque a un archivo que no cabe en memoria.
+        El esquema se fija con el primer bloque (o se usa `esquema`) y todos los
+        bloques se convierten a esos tipos; una columna sin valores en el primer
+        bloque queda como texto, una de enteros que luego trae decimales pasa a
+        decimales (también en lo ya escrito) y cualquier otro valor que no calza
+        con el tipo fijado es un error (ver convertir_serie). Cada bloque se
+        escribe en `salida` (.parquet o .csv) y/o se acumula en un resumen como
+        el de resumir(Agrup, Suma). La salida se arma en un archivo temporal
+        junto a `salida` que solo la reemplaza al terminar sin errores.
+        Devuelve {"filas", "esquema", "resumen"}
+        """
+        escritor = None
+        parciales = []
+        filas = 0
+        opciones.setdefault("dtype", object)
+        como_parquet = salida is not None and str(salida).lower().endswith(".parquet")
+        temporal = None
+        if salida is not None:
+            descriptor, temporal = tempfile.mkstemp(suffix=os.path.splitext(str(salida))[1],
+                                                    dir=os.path.dirname(os.path.abspath(salida)))
+            os.close(descriptor)
+        try:
+            for bloque in DataProcessor.leer_por_bloques(origen, tamaño_bloque, **opciones):
+                if esquema is None:
+                    muestra_bloque = bloque.replace("", pd.NA)
+                    # Sin valores no hay de dónde inferir el tipo: texto no pierde nada
+                    vacias = [col for col in muestra_bloque.columns if muestra_bloque[col].isna().all()]
+                    convertido, conversiones = DataProcessor.convertir_columnas(
+                        muestra_bloque, {"texto": vacias}, muestra=muestra)
+                    esquema = DataProcessor.crear_esquema(convertido, conversiones)
+                bloque = DataProcessor.rellenar_vacios(bloque, esquema, estricto=True)
+                tipos = esquema.setdefault("tipos", {str(col): str(dtype) for col, dtype in bloque.dtypes.items()})
+                # Enteros que en este bloque traen decimales: la columna pasa a decimales
+                ensanchadas = [col for col in esquema.get("enteros", [])
+                               if col in bloque and pd.api.types.is_float_dtype(bloque[col])]
+                if ensanchadas:
+                    esquema["enteros"] = [col for col in esquema["enteros"] if col not in ensanchadas]
+                    esquema.setdefault("decimales", []).extend(ensanchadas)
+                    tipos.update({str(col): "float64" for col in ensanchadas})
+                    if escritor is not None:
+                        escritor, temporal = _ensanchar_parquet(escritor, temporal, ensanchadas)
+                distintos = {col: tipo for col, tipo in tipos.items() if col in bloque and str(bloque[col].dtype) != tipo}
+                if distintos:
+                    bloque = bloque.astype(distintos)
+
+                if como_parquet:
+                    escritor = _escribir_parquet(bloque, temporal, escritor)
+                elif salida is not None:
+                    bloque.to_csv(temporal, mode="a" if filas else "w", header=not filas, index=False)
+                if Agrup is not None:
+                    parciales.append(DataProcessor.resumir(bloque, Agrup, Suma))
+                    if len(parciales) >= 64:
+                        parciales = [pd.concat(parciales).groupby([Agrup]).sum().reset_index()]
+                filas += len(bloque)
+            if escritor is not None:
+                escritor.close()
+                escritor = None
+            if temporal is not None:
+                os.replace(temporal, salida)
+                temporal = None
+        finally:
+            if escritor is not None:
+                escritor.close()
+            if temporal is not None and os.path.exists(temporal):
+                os.remove(temporal)
+
+        resumen = None
+        if Agrup is not None and parciales:
+            resumen = pd.concat(parciales).groupby([Agrup]).sum().reset_index()
+        return {"filas": filas, "esquema": esquema, "resumen": resumen}
+
+    @staticmethod
+    def flujo(df: pd.DataFrame) -> "Flujo":
+        """
+        Inicia una cadena diferida de operaciones sobre df (ver Flujo)
+        """
+        return Flujo(df)
+
     @staticmethod
     def cruzar_diferencias(tab1: pd.DataFrame, tab2: pd.DataFrame) -> pd.DataFrame:
         """
@@ -326,7 +1008,7 @@ class DataProcessor:
         L1 = ll[ll["Regla"]=="L1"]
         L2 = ll[ll["Regla"]=="L2"]
         
-        ll = DataProcessor.resumen_columnas(tab1[OK["Key"]]).merge(DataProcessor.resumen_columnas(tab2[OK["Key"]]),on="Columna",how="outer")
+        ll = DataProcessor.perfil_columnas(tab1[OK["Key"]]).merge(DataProcessor.perfil_columnas(tab2[OK["Key"]]),on="Columna",how="outer")
         ll["Dif_Cantidad"] = ll["Cantidad_x"]-ll["Cantidad_y"]
         ll["Dif_Suma"] = ll["Suma_x"]-ll["Suma_y"]
         ll["Dif_Suma"] = ll["Suma_x"]-ll["Suma_y"]
@@ -334,6 +1016,134 @@ class DataProcessor:
         return ll
 
 
+_CONVERSIONES = ("convertir_columnas", "rellenar_vacios")
+
+
+class Flujo:
+    """
+    Cadena diferida de operaciones de DataProcessor sobre un DataFrame.
+
+    Los pasos se registran y recién se ejecutan con ejecutar(), después de
+    optimizarlos: las conversiones seguidas se hacen una sola vez, la clave
+    que cruzar_registro vuelve a construir no se calcula, y solo se cargan las
+    columnas que algún paso necesita. La tabla se copia una sola vez al inicio
+    (copia superficial con Copy-on-Write) y los pasos trabajan sobre esa copia.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.pasos: List[Tuple[str, Dict[str, Any]]] = []
+
+    def _agregar(self, nombre: str, **parametros) -> "Flujo":
+        self.pasos.append((nombre, parametros))
+        return self
+
+    def renombrar_columnas(self) -> "Flujo":
+        return self._agregar("renombrar_columnas")
+
+    def convertir_columnas(self, esquema: Optional[Dict[str, Any]] = None, muestra: int = 10000) -> "Flujo":
+        return self._agregar("convertir_columnas", esquema=esquema, muestra=muestra)
+
+    def rellenar_vacios(self, esquema: Optional[Dict[str, Any]] = None) -> "Flujo":
+        return self._agregar("rellenar_vacios", esquema=esquema)
+
+    def seleccionar(self, columnas: List[str]) -> "Flujo":
+        return self._agregar("seleccionar", columnas=list(columnas))
+
+    def añadir_key_and_indice(self, columna: str = "Key", Key: bool = True, Indice: bool = False,
+                              excepciones: List[str] = [], huella: bool = False) -> "Flujo":
+        return self._agregar("añadir_key_and_indice", columna=columna, Key=Key, Indice=Indice,
+                             excepciones=list(excepciones), huella=huella)
+
+    def cruzar_registro(self, original: pd.DataFrame, excepciones: List[str] = [], method: str = "nuevos",
+                        huella: bool = False) -> "Flujo":
+        """La tabla del flujo hace de `nuevo` frente a `original`"""
+        return self._agregar("cruzar_registro", original=original, excepciones=list(excepciones),
+                             method=method, huella=huella)
+
+    def optimizar(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Pasos que realmente se ejecutan: una racha de conversiones queda en una
+        sola (rellenar_vacios si hay alguno, con el último esquema entregado),
+        un renombrar repetido se hace una vez y se omite la clave "Key" que el
+        cruzar_registro siguiente reemplaza
+        """
+        pasos = []
+        for nombre, parametros in self.pasos:
+            anterior = pasos[-1][0] if pasos else None
+            if nombre in _CONVERSIONES and anterior in _CONVERSIONES:
+                esquema = parametros.get("esquema") or pasos[-1][1].get("esquema")
+                fusion = "rellenar_vacios" if "rellenar_vacios" in (nombre, anterior) else nombre
+                pasos[-1] = (fusion, {**pasos[-1][1], **parametros, "esquema": esquema})
+            elif nombre == "renombrar_columnas" and anterior == nombre:
+                continue
+            elif (nombre == "cruzar_registro" and anterior == "añadir_key_and_indice"
+                  and pasos[-1][1]["columna"] == "Key"):
+                pasos[-1] = (nombre, parametros)
+            else:
+                pasos.append((nombre, parametros))
+        return pasos
+
+    def columnas_necesarias(self, pasos: Optional[List[Tuple[str, Dict[str, Any]]]] = None) -> List[str]:
+        """
+        Columnas de la tabla de entrada que algún paso usa o entrega al final;
+        el resto no se copia
+        """
+        pasos = self.optimizar() if pasos is None else pasos
+        presentes = [list(self.df.columns)]
+        for nombre, parametros in pasos:
+            columnas = presentes[-1]
+            if nombre == "renombrar_columnas":
+                columnas = [_nombre_columna(col) for col in columnas]
+            elif nombre == "seleccionar":
+                columnas = [col for col in parametros["columnas"] if col in columnas]
+            elif nombre == "añadir_key_and_indice":
+                creadas = [parametros["columna"]] + ([f"{parametros['columna']}2"] if parametros["Indice"] else [])
+                columnas = columnas + [col for col in creadas if col not in columnas]
+            presentes.append(columnas)
+
+        necesarias = set(presentes[-1])
+        for (nombre, parametros), columnas in zip(reversed(pasos), reversed(presentes[:-1])):
+            if nombre == "renombrar_columnas":
+                necesarias = {col for col in columnas if _nombre_columna(col) in necesarias}
+            elif nombre == "seleccionar":
+                necesarias = set(parametros["columnas"])
+            elif nombre == "añadir_key_and_indice":
+                columna = parametros["columna"]
+                necesarias -= {columna, f"{columna}2"}
+                if parametros["Key"]:
+                    necesarias |= {col for col in columnas if col not in parametros["excepciones"]}
+                elif parametros["Indice"]:
+                    necesarias.add(columna)
+            elif nombre == "cruzar_registro":
+                necesarias = set(columnas)
+        return [col for col in self.df.columns if col in necesarias]
+
+    def ejecutar(self) -> pd.DataFrame:
+        pasos = self.optimizar()
+        columnas = self.columnas_necesarias(pasos)
+        if len(columnas) < self.df.shape[1]:
+            df = self.df.reindex(columns=columnas)
+        else:
+            df = self.df.copy(deep=not _COPIA_DIFERIDA)
+
+        for nombre, parametros in pasos:
+            if nombre == "renombrar_columnas":
+                df = DataProcessor.renombrar_columnas(df)
+            elif nombre == "convertir_columnas":
+                df, _ = DataProcessor.convertir_columnas(df, parametros["esquema"], parametros["muestra"], copiar=False)
+            elif nombre == "rellenar_vacios":
+                df = DataProcessor.rellenar_vacios(df, parametros["esquema"], copiar=False)
+            elif nombre == "seleccionar":
+                df = df[[col for col in parametros["columnas"] if col in df.columns]]
+            elif nombre == "añadir_key_and_indice":
+                df = DataProcessor.añadir_key_and_indice(df, copiar=False, **parametros)
+            elif nombre == "cruzar_registro":
+                df = DataProcessor.cruzar_registro(parametros["original"], df, parametros["excepciones"],
+                                                   parametros["method"], parametros["huella"])
+        return df
+
+
 # Funciones de compatibilidad hacia atrás (mantienen nombres originales)
 def Enumerar(lista: List[Any]) -> None:
     """Genera un listado numerado de los elementos de una lista"""
@@ -351,9 +1161,22 @@ def Valores_Numericos(valor1: Any, operacion: Optional[callable] = None) -> Unio
     """Convierte un valor a numérico aplicando operación opcional"""
     return DataProcessor.valores_numericos(valor1,operacion)
 
-def convertir_columnas(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+def convertir_columnas(df: pd.DataFrame, esquema: Optional[Dict[str, Any]] = None,
+                       muestra: int = 10000, compacto: bool = False) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
     """Convierte automáticamente las columnas del DataFrame a sus tipos apropiados"""
-    return DataProcessor.convertir_columnas(df)
+    return DataProcessor.convertir_columnas(df, esquema, muestra, compacto=compacto)
+
+def Crear_Esquema(df: pd.DataFrame, conversiones: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Esquema reutilizable: las conversiones más el dtype final de cada columna"""
+    return DataProcessor.crear_esquema(df, conversiones)
+
+def Guardar_Esquema(esquema: Dict[str, Any], ruta: str) -> None:
+    """Guarda un esquema (conversiones + tipos) como JSON"""
+    return DataProcessor.guardar_esquema(esquema, ruta)
+
+def Cargar_Esquema(ruta: str) -> Dict[str, Any]:
+    """Lee un esquema guardado con Guardar_Esquema"""
+    return DataProcessor.cargar_esquema(ruta)
 
 def Renombrar_columnas(df: pd.DataFrame) -> pd.DataFrame:
     """Convierte nombres de columnas a mayúsculas y reemplaza espacios y puntos por guiones bajos"""
@@ -367,21 +1190,39 @@ def Resumen_columnas(tabla: pd.DataFrame) -> pd.DataFrame:
     """Genera resumen estadístico de cada columna del DataFrame"""
     return DataProcessor.resumen_columnas(tabla)
 
-def Añadir_key_and_Indice(tabla: pd.DataFrame, columna: str = "Key", Key: bool = True, Indice: bool = False, excepciones: List[str] = []) -> pd.DataFrame:
+def Perfil_Columnas(tabla: pd.DataFrame, procesos: Optional[int] = None, aproximado: bool = False,
+                    elementos: bool = False) -> pd.DataFrame:
+    """Perfil de todas las columnas (filas, nulos, distintos, sumas, mínimo y máximo) en paralelo"""
+    return DataProcessor.perfil_columnas(tabla, procesos, aproximado, elementos)
+
+def Añadir_key_and_Indice(tabla: pd.DataFrame, columna: str = "Key", Key: bool = True, Indice: bool = False, excepciones: List[str] = [],
+                          huella: bool = False) -> pd.DataFrame:
     """Añade columna clave combinando valores de columnas y opcionalmente índice secuencial"""
-    return DataProcessor.añadir_key_and_indice(tabla, columna, Key, Indice, excepciones)
+    return DataProcessor.añadir_key_and_indice(tabla, columna, Key, Indice, excepciones, huella)
 
-def nuevo_registros(Tabla_nueva: pd.DataFrame, Tabla_antigua: pd.DataFrame) -> Optional[pd.DataFrame]:
+def nuevo_registros(Tabla_nueva: pd.DataFrame, Tabla_antigua: pd.DataFrame, huella: bool = False) -> Optional[pd.DataFrame]:
     """Identifica registros nuevos comparando dos DataFrames con misma estructura"""
-    return DataProcessor.nuevo_registros(Tabla_nueva, Tabla_antigua)
+    return DataProcessor.nuevo_registros(Tabla_nueva, Tabla_antigua, huella)
 
-def Cruzar_registro(original: pd.DataFrame, nuevo: pd.DataFrame, excepciones: List[str] = [], method: str = "nuevos") -> pd.DataFrame:
+def Cruzar_registro(original: pd.DataFrame, nuevo: pd.DataFrame, excepciones: List[str] = [], method: str = "nuevos",
+                    huella: bool = False) -> pd.DataFrame:
     """Cruza registros entre DataFrames para encontrar nuevos o iguales"""
-    return DataProcessor.cruzar_registro(original,nuevo,excepciones,method)
+    return DataProcessor.cruzar_registro(original,nuevo,excepciones,method,huella)
 
-def Rellenar_Vacios(df: pd.DataFrame) -> pd.DataFrame:
+def Diferencias_Registros(nuevo: pd.DataFrame, anterior: Union[pd.DataFrame, np.ndarray, str, None] = None,
+                          excepciones: List[str] = [], guardar: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Compara una tabla con la foto anterior por huellas de fila: nuevos, iguales y eliminados"""
+    return DataProcessor.diferencias_registros(nuevo, anterior, excepciones, guardar)
+
+def Rellenar_Vacios(df: pd.DataFrame, esquema: Optional[Dict[str, Any]] = None, estricto: bool = False) -> pd.DataFrame:
     """Rellena valores vacíos del DataFrame según el tipo de dato de cada columna"""
-    return DataProcessor.rellenar_vacios(df)
+    return DataProcessor.rellenar_vacios(df, esquema, estricto)
+
+def Procesar_Por_Bloques(origen: Union[str, pd.DataFrame], salida: Optional[str] = None, Agrup: Optional[str] = None,
+                         Suma: Optional[str] = None, tamaño_bloque: int = 100000,
+                         esquema: Optional[Dict[str, Any]] = None, muestra: int = 10000, **opciones) -> Dict[str, Any]:
+    """Limpia un archivo grande por bloques con el esquema del primer bloque y lo escribe o resume"""
+    return DataProcessor.procesar_por_bloques(origen, salida, Agrup, Suma, tamaño_bloque, esquema, muestra, **opciones)
 
 def Resumir(Tabla: pd.DataFrame, Agrup: str, Suma: Optional[str] = None) -> pd.DataFrame:
     """Genera resumen agrupado con conteos y opcionalmente sumas"""
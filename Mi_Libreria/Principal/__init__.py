@@ -3,18 +3,25 @@
 # Import the main class and all compatibility functions
 from .Principal import (
     DataProcessor,
+    Flujo,
     Enumerar,
     Numeros,
     Extraer_numeros,
     Valores_Numericos,
     convertir_columnas,
+    Crear_Esquema,
+    Guardar_Esquema,
+    Cargar_Esquema,
     Renombrar_columnas,
     Comunes,
     Resumen_columnas,
+    Perfil_Columnas,
     Añadir_key_and_Indice,
     nuevo_registros,
     Cruzar_registro,
+    Diferencias_Registros,
     Rellenar_Vacios,
+    Procesar_Por_Bloques,
     Resumir,
     Cruzar_Diferencias
 )
@@ -22,18 +29,25 @@ from .Principal import (
 # Export everything
 __all__ = [
     'DataProcessor',
+    'Flujo',
     'Enumerar',
     'Numeros',
     'Extraer_numeros',
     'Valores_Numericos',
     'convertir_columnas',
+    'Crear_Esquema',
+    'Guardar_Esquema',
+    'Cargar_Esquema',
     'Renombrar_columnas',
     'Comunes',
     'Resumen_columnas',
+    'Perfil_Columnas',
     'Añadir_key_and_Indice',
     'nuevo_registros',
     'Cruzar_registro',
+    'Diferencias_Registros',
     'Rellenar_Vacios',
+    'Procesar_Por_Bloques',
     'Resumir',
     'Cruzar_Diferencias'
 ]
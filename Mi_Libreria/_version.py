@@ -22,6 +22,9 @@ DEPENDENCIES = {
         "selenium>=4.0.0",
         "pyodbc>=4.0.0"
     ],
+    "parquet": [
+        "pyarrow>=10.0.0"
+    ],
     "dev": [
         "pytest>=7.0.0",
         "pytest-asyncio>=0.20.0",
@@ -19,6 +19,9 @@ setup(
             "playwright>=1.40.0",
             "python-dotenv>=1.0.0"
         ],
+        "parquet": [
+            "pyarrow>=10.0.0"
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.20.0",
@@ -0,0 +1,274 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Mi_Libreria.Cruze import (ETAPA_COMBINACION, AlmacenCruces, Combinacion, EstadisticasCruce, Presupuesto,
+                               Proceso, Proceso_Incremental, Proceso_Particionado, Subconjuntos_Suma)
+from Mi_Libreria.Cruze.Benchmark import Generar_Banco_Libro
+from Mi_Libreria.Cruze.Cruze import _Pares_Cercanos_Fecha, _Pares_En_Ventana
+
+TOLERANCIA = 5
+
+
+@pytest.fixture(scope="module")
+def banco_libro():
+    return Generar_Banco_Libro(3000, ruido_maximo=TOLERANCIA, filas_por_rut=20)
+
+
+def _Pares(resultado):
+    # Pares (Id_x, Id_y) de un ResultadoCruce, ordenados
+    cruzados = resultado.pos_y >= 0
+    pares = np.column_stack([resultado.pos_x[cruzados] + 1, resultado.pos_y[cruzados] + 1])
+    return pares[np.lexsort(pares.T[::-1])]
+
+
+def test_subconjuntos_grandes_terminan():
+    # 50 candidatos sin solución fácil: la búsqueda no debe explotar con el tamaño
+    rng = np.random.default_rng(0)
+    candidatos = rng.integers(1, 10**6, size=50)
+    objetivos = candidatos[rng.permutation(50)[:24]].reshape(3, 8).sum(axis=1)
+    inicio = time.perf_counter()
+    asignaciones = Subconjuntos_Suma(objetivos, candidatos, 8)
+    assert time.perf_counter() - inicio < 15
+    assert len(asignaciones) >= 1
+    usados = [j for _, elegidos in asignaciones for j in elegidos]
+    assert len(usados) == len(set(usados))
+    for i, elegidos in asignaciones:
+        assert candidatos[elegidos].sum() == objetivos[i]
+
+
+def test_presupuesto_por_omision_acota_la_busqueda():
+    rng = np.random.default_rng(1)
+    candidatos = rng.integers(1, 10**6, size=1000)
+    presupuesto = Presupuesto().iniciar()
+    Subconjuntos_Suma(rng.integers(1, 10**6, size=20) * 7 + 1, candidatos * 7, 4, presupuesto=presupuesto)
+    assert presupuesto.agotado
+
+
+def test_sin_agrupacion_las_tablas_no_se_recorren_en_cada_cruce():
+    # Sin Agrupacion todo el libro es un solo grupo y la búsqueda usa las
+    # tablas meet-in-the-middle; cada subconjunto aceptado no debe recorrerlas
+    libro, banco = Generar_Banco_Libro(5000, ruido_maximo=TOLERANCIA)
+    inicio = time.perf_counter()
+    resultado = Proceso(libro, banco, "MONTO", "", TOLERANCIA, compacto=True)
+    assert time.perf_counter() - inicio < 30
+    pares = _Pares(resultado)
+    assert len(np.unique(pares[:, 1])) == len(pares)
+    assert (resultado.etapa == ETAPA_COMBINACION).any()
+
+
+def test_max_memoria_acota_combinacion_y_subconjuntos():
+    base = pd.DataFrame({"Id_y": np.arange(1, 31), "MONTO": np.arange(30) * 7 % 11})
+    completa = Combinacion(base, 3, "MONTO")
+    acotada = Combinacion(base, 3, "MONTO", Presupuesto(max_memoria=50_000))
+    assert 0 < len(acotada) < len(completa)
+    pd.testing.assert_frame_equal(acotada.drop(columns="Rango"), completa.drop(columns="Rango").head(len(acotada)))
+
+    rng = np.random.default_rng(0)
+    candidatos = rng.integers(1, 10**6, size=50)
+    presupuesto = Presupuesto(max_memoria=1).iniciar()
+    assert Subconjuntos_Suma(candidatos[:8].sum(keepdims=True) + 1, candidatos, 8, presupuesto=presupuesto) == []
+    assert presupuesto.agotado
+
+
+def test_montos_enteros_con_nulos_de_pandas():
+    # Montos Int64 (tipo con nulos de pandas) cruzan igual que int64
+    data1 = pd.DataFrame({"Monto": pd.array([100, 250, 300, 505], dtype="Int64"), "G": [1, 1, 2, 2]})
+    data2 = pd.DataFrame({"Monto": pd.array([100, 150, 100, 300, 500], dtype="Int64"), "G": [1, 1, 1, 2, 2]})
+    esperado = Proceso(data1.astype({"Monto": "int64"}), data2.astype({"Monto": "int64"}), "Monto", "G", 5)
+    resultado = Proceso(data1, data2, "Monto", "G", 5)
+    pd.testing.assert_frame_equal(resultado[["Id_x", "Id_y"]], esperado[["Id_x", "Id_y"]])
+    assert resultado["Id_y"].notna().sum() == 5
+
+    data1.loc[3, "Monto"] = pd.NA
+    resultado = Proceso(data1, data2, "Monto", "G", 5)
+    assert resultado.loc[resultado["Id_x"] == 4, "Id_y"].isna().all()
+    # Con decimales los nulos tampoco cruzan y el resto cruza igual
+    escalado = Proceso(data1, data2, "Monto", "G", 5, decimales=2)
+    pd.testing.assert_frame_equal(escalado[["Id_x", "Id_y"]], resultado[["Id_x", "Id_y"]])
+
+
+def test_agrupacion_compuesta():
+    # El mismo monto en otra combinación de claves no cruza
+    data1 = pd.DataFrame({"RUT": [1, 1, 2], "TIPO": ["F", "N", "F"], "M": [100, 100, 100]})
+    data2 = pd.DataFrame({"RUT": [1, 2, 1, 3], "TIPO": ["N", "F", "F", "F"], "M": [100, 100, 100, 100]})
+    tabla = Proceso(data1, data2, "M", ["RUT", "TIPO"], compacto=True).pares(detalle=True)
+    assert tabla[["Id_x", "Id_y"]].values.tolist() == [[1, 3], [2, 1], [3, 2]]
+    assert tabla["Grupo"].tolist() == [(1, "F"), (1, "N"), (2, "F")]
+    # Un grupo sin contraparte no se cruza
+    assert 4 not in Proceso(data1, data2, "M", ["RUT", "TIPO"])["Id_y"].tolist()
+
+
+def _Dias_Desde(*fechas):
+    return ((pd.to_datetime(list(fechas)) - pd.Timestamp(0)) / pd.Timedelta(days=1)).values
+
+
+def test_pares_en_ventana():
+    montos1 = np.array([100, 100, 200, 300])
+    montos2 = np.array([100, 100, 100, 200, 300])
+    dias1 = _Dias_Desde("2024-01-10", "2024-01-20", "2024-01-01", None)
+    dias2 = _Dias_Desde("2024-01-19", "2024-01-09", "2024-01-12", "2024-01-05", "2024-01-01")
+    ceros1, ceros2 = np.zeros(4, dtype=np.int64), np.zeros(5, dtype=np.int64)
+    pos_x, pos_y = _Pares_En_Ventana(montos1, montos2, ceros1, ceros2, dias1, dias2, 3)
+    # Cada 100 toma el de fecha más cercana; 200 queda a 4 días y 300 no tiene fecha
+    assert sorted(zip(pos_x.tolist(), pos_y.tolist())) == [(0, 1), (1, 0)]
+    pos_x, pos_y = _Pares_En_Ventana(montos1, montos2, ceros1, ceros2, dias1, dias2, 4)
+    assert sorted(zip(pos_x.tolist(), pos_y.tolist())) == [(0, 1), (1, 0), (2, 3)]
+    # Otro bloque no cruza aunque coincidan monto y fecha
+    pos_x, _ = _Pares_En_Ventana(montos1, montos2, ceros1, ceros2 + 1, dias1, dias2, 4)
+    assert len(pos_x) == 0
+
+
+def test_pares_cercanos_fecha():
+    montos1 = np.array([1000, 2000])
+    montos2 = np.array([1004, 1001, 2003, 2000])
+    dias1 = _Dias_Desde("2024-01-10", "2024-01-10")
+    dias2 = _Dias_Desde("2024-01-10", "2024-01-14", "2024-01-11", "2024-01-30")
+    ceros1, ceros2 = np.zeros(2, dtype=np.int64), np.zeros(4, dtype=np.int64)
+    pos_x, pos_y = _Pares_Cercanos_Fecha(montos1, montos2, ceros1, ceros2, dias1, dias2, 5, 5)
+    # 1000: (4, 0 días) está más cerca que (1, 4 días) en unidades de cada tolerancia;
+    # 2000: el monto exacto está a 20 días, fuera de la ventana
+    assert sorted(zip(pos_x.tolist(), pos_y.tolist())) == [(0, 0), (1, 2)]
+    pos_x, pos_y = _Pares_Cercanos_Fecha(montos1, montos2, ceros1, ceros2, dias1, dias2, 2, 5)
+    assert sorted(zip(pos_x.tolist(), pos_y.tolist())) == [(0, 1)]
+
+
+def test_proceso_con_ventana_de_fechas():
+    libro = pd.DataFrame({"M": [100, 100, 500], "F": pd.to_datetime(["2024-01-10", "2024-03-01", "2024-01-10"])})
+    banco = pd.DataFrame({"M": [100, 100, 503], "F": pd.to_datetime(["2024-03-02", "2024-01-11", "2024-01-30"])})
+    tabla = Proceso(libro, banco, "M", tolerancia=5, fecha="F", ventana_dias=3, compacto=True).pares(detalle=True)
+    cruzados = tabla.dropna(subset=["Id_y"])
+    assert cruzados[["Id_x", "Id_y"]].values.tolist() == [[1, 2], [2, 1]]
+    assert (cruzados["Etapa"] == "exacta").all()
+    # 503 está dentro de la tolerancia pero a 20 días
+    assert tabla.loc[tabla["Id_x"] == 3, "Etapa"].tolist() == ["sin_cruce"]
+
+
+def test_combinacion_respeta_la_fecha_del_registro():
+    libro = pd.DataFrame({"M": [1000, 500], "F": pd.to_datetime(["2024-01-01", "2024-01-01"])})
+    banco = pd.DataFrame({"M": [400, 600, 500], "F": pd.to_datetime(["2024-12-01", "2024-12-02", "2024-12-01"])})
+    # Los movimientos están cerca entre sí pero lejos del registro: nada cruza
+    resultado = Proceso(libro, banco, "M", fecha="F", ventana_dias=5, compacto=True)
+    assert (resultado.pos_y < 0).all()
+
+    banco["F"] = pd.to_datetime(["2024-01-03", "2023-12-29", "2024-01-02"])
+    tabla = Proceso(libro, banco, "M", fecha="F", ventana_dias=5, compacto=True).pares(detalle=True)
+    combinados = tabla[tabla["Etapa"] == "combinacion"]
+    assert combinados["Id_x"].tolist() == [1, 1]
+    assert sorted(combinados["Id_y"].tolist()) == [1, 2]
+    # 400 y 600 a 6 días uno del otro ya no caben en la ventana
+    banco["F"] = pd.to_datetime(["2024-01-04", "2023-12-29", "2024-01-02"])
+    tabla = Proceso(libro, banco, "M", fecha="F", ventana_dias=5, compacto=True).pares(detalle=True)
+    assert not (tabla["Etapa"] == "combinacion").any()
+
+
+def test_un_movimiento_no_se_usa_dos_veces(banco_libro):
+    libro, banco = banco_libro
+    resultado = Proceso(libro, banco, "MONTO", "RUT", TOLERANCIA, compacto=True)
+    pares = _Pares(resultado)
+    assert len(pares) > 0
+    assert len(np.unique(pares[:, 1])) == len(pares)
+
+
+def test_sumas_dentro_de_la_tolerancia(banco_libro):
+    libro, banco = banco_libro
+    pares = _Pares(Proceso(libro, banco, "MONTO", "RUT", TOLERANCIA, compacto=True))
+    sumas = pd.Series(banco["MONTO"].values[pares[:, 1] - 1]).groupby(pares[:, 0]).sum()
+    diferencia = libro["MONTO"].values[sumas.index - 1] - sumas.values
+    assert (np.abs(diferencia) <= TOLERANCIA).all()
+
+
+def test_paralelo_igual_a_secuencial(banco_libro):
+    libro, banco = banco_libro
+    secuencial = Proceso(libro, banco, "MONTO", "RUT", TOLERANCIA)
+    paralelo = Proceso(libro, banco, "MONTO", "RUT", TOLERANCIA, procesos=2)
+    pd.testing.assert_frame_equal(secuencial, paralelo)
+
+
+def test_particionado_igual_a_proceso(banco_libro, tmp_path):
+    libro, banco = banco_libro
+    esperado = _Pares(Proceso(libro, banco, "MONTO", "RUT", TOLERANCIA, compacto=True))
+    salida = tmp_path / "pares.csv"
+    Proceso_Particionado(libro, banco, "MONTO", "RUT", salida, TOLERANCIA, particiones=4, tamaño_bloque=700)
+    escritos = pd.read_csv(salida).dropna(subset=["Id_y"])
+    pares = np.column_stack([escritos["Id_x"].values, escritos["Id_y"].values.astype(np.int64)])
+    np.testing.assert_array_equal(pares[np.lexsort(pares.T[::-1])], esperado)
+
+
+def test_incremental_igual_a_proceso(banco_libro, tmp_path):
+    libro, banco = banco_libro
+    esperado = _Pares(Proceso(libro, banco, "MONTO", "RUT", TOLERANCIA, compacto=True))
+    almacen = AlmacenCruces(str(tmp_path / "pares.sqlite"))
+    primero, _ = Proceso_Incremental(libro, banco, "MONTO", almacen, "RUT", TOLERANCIA)
+    np.testing.assert_array_equal(_Pares(primero), esperado)
+    # Sin cambios en los datos, la segunda corrida conserva todos los pares guardados
+    segundo, invalidados = Proceso_Incremental(libro, banco, "MONTO", almacen, "RUT", TOLERANCIA)
+    np.testing.assert_array_equal(_Pares(segundo), esperado)
+    assert len(invalidados) == 0
+
+
+@pytest.fixture
+def almacen_guardado(tmp_path):
+    # A/100 <-> 100 y A/200 <-> 200 ya guardados
+    libro = pd.DataFrame({"G": ["A", "A"], "M": [100, 200]})
+    banco = pd.DataFrame({"G": ["A", "A"], "M": [100, 200]})
+    almacen = AlmacenCruces(str(tmp_path / "pares.sqlite"))
+    Proceso_Incremental(libro, banco, "M", almacen, "G", TOLERANCIA)
+    return libro, banco, almacen
+
+
+def test_incremental_fila_nueva_sin_cruce(almacen_guardado):
+    libro, banco, almacen = almacen_guardado
+    libro = pd.concat([libro, pd.DataFrame({"G": ["A"], "M": [999]})], ignore_index=True)
+    resultado, invalidados = Proceso_Incremental(libro, banco, "M", almacen, "G", TOLERANCIA)
+    tabla = resultado.pares(detalle=True)
+    esperado = Proceso(libro, banco, "M", "G", TOLERANCIA, compacto=True).pares(detalle=True)
+    pd.testing.assert_frame_equal(tabla, esperado)
+    assert tabla["Etapa"].tolist() == ["exacta", "exacta", "sin_cruce"]
+    assert len(invalidados) == 0
+
+
+def test_incremental_fila_modificada(almacen_guardado):
+    libro, banco, almacen = almacen_guardado
+    banco = banco.assign(M=[100, 203])
+    resultado, invalidados = Proceso_Incremental(libro, banco, "M", almacen, "G", TOLERANCIA)
+    # El par guardado de la fila modificada se invalida y se vuelve a cruzar
+    assert invalidados["Id_x"].tolist() == [2]
+    assert invalidados["Id_y"].isna().all()
+    tabla = resultado.pares(detalle=True)
+    assert tabla[["Id_x", "Id_y"]].values.tolist() == [[1, 1], [2, 2]]
+    assert tabla["Etapa"].tolist() == ["exacta", "tolerancia"]
+    # La corrida siguiente ya no invalida nada
+    _, invalidados = Proceso_Incremental(libro, banco, "M", almacen, "G", TOLERANCIA)
+    assert len(invalidados) == 0
+
+
+def test_incremental_con_estadisticas(almacen_guardado):
+    libro, banco, almacen = almacen_guardado
+    resultado, invalidados, estadisticas = Proceso_Incremental(
+        libro, banco, "M", almacen, "G", TOLERANCIA, estadisticas=True)
+    assert len(resultado) == 2 and len(invalidados) == 0
+    assert isinstance(estadisticas, EstadisticasCruce)
+
+
+def test_texto_es_etapa_de_respaldo():
+    # El monto exacto gana aunque la glosa apunte a otro movimiento; la glosa
+    # solo decide entre las filas que quedaron libres
+    data1 = pd.DataFrame({"Monto": [1000, 2003, 2004], "Glosa": ["pago luz", "arriendo marzo", "arriendo abril"]})
+    data2 = pd.DataFrame({"Monto": [1000, 2000, 2001], "Glosa": ["arriendo marzo", "arriendo abril", "arriendo marzo"]})
+    resultado = Proceso(data1, data2, "Monto", tolerancia=5, texto="Glosa", compacto=True)
+    pares = dict(zip(resultado.pos_x.tolist(), resultado.pos_y.tolist()))
+    assert pares == {0: 0, 1: 2, 2: 1}
+
+
+def test_tolerancia_en_unidades_minimas_se_trunca():
+    data1 = pd.DataFrame({"Monto": [10.00, 20.00]})
+    data2 = pd.DataFrame({"Monto": [10.01, 20.29]})
+    # 0,005 no alcanza a un centavo: 10,00 y 10,01 no cruzan
+    resultado = Proceso(data1, data2, "Monto", tolerancia=0.005, decimales=2, compacto=True)
+    assert (resultado.pos_y < 0).all()
+    # 0,29 son 29 centavos aunque 0.29 * 100 no sea exacto en binario
+    resultado = Proceso(data1, data2, "Monto", tolerancia=0.29, decimales=2, compacto=True)
+    assert resultado.pos_y.tolist() == [0, 1]
@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Mi_Libreria.Principal import DataProcessor
+
+
+@pytest.fixture
+def enteros_luego_decimales(tmp_path):
+    # "monto" es de enteros en el primer bloque (4 filas) y trae decimales después
+    ruta = tmp_path / "entrada.csv"
+    pd.DataFrame({
+        "id": range(1, 11),
+        "monto": ["10", "20", "30", "40", "1,5", "60", "", "80", "2,25", "9"],
+        "g": list("ababababab"),
+    }).to_csv(ruta, index=False)
+    return ruta
+
+
+def test_procesar_por_bloques_ensancha_enteros(enteros_luego_decimales, tmp_path):
+    salida = tmp_path / "salida.csv"
+    resultado = DataProcessor.procesar_por_bloques(str(enteros_luego_decimales), str(salida), Agrup="g",
+                                                   Suma="monto", tamaño_bloque=4)
+    assert resultado["esquema"]["tipos"]["monto"] == "float64"
+    assert "monto" in resultado["esquema"]["decimales"]
+    escrito = pd.read_csv(salida)
+    assert escrito["monto"].tolist() == [10, 20, 30, 40, 1.5, 60, 0, 80, 2.25, 9]
+    assert resultado["resumen"].set_index("g")["suma"].to_dict() == {"a": 43.75, "b": 209}
+    assert sorted(os.listdir(tmp_path)) == ["entrada.csv", "salida.csv"]
+
+
+def test_procesar_por_bloques_ensancha_parquet(enteros_luego_decimales, tmp_path):
+    pytest.importorskip("pyarrow")
+    salida = tmp_path / "salida.parquet"
+    DataProcessor.procesar_por_bloques(str(enteros_luego_decimales), str(salida), tamaño_bloque=4)
+    escrito = pd.read_parquet(salida)
+    assert escrito["monto"].tolist() == [10, 20, 30, 40, 1.5, 60, 0, 80, 2.25, 9]
+    assert sorted(os.listdir(tmp_path)) == ["entrada.csv", "salida.parquet"]
+
+
+def test_procesar_por_bloques_no_pierde_texto(tmp_path):
+    ruta = tmp_path / "entrada.csv"
+    pd.DataFrame({"monto": ["10", "20", "30", "factura anulada"], "obs": ["", "", "", "12,5"]}).to_csv(ruta, index=False)
+    salida = tmp_path / "salida.csv"
+    with pytest.raises(ValueError, match="factura anulada"):
+        DataProcessor.procesar_por_bloques(str(ruta), str(salida), tamaño_bloque=3)
+    # No queda un archivo a medio escribir
+    assert sorted(os.listdir(tmp_path)) == ["entrada.csv"]
+
+    # Una columna vacía en el primer bloque queda como texto
+    pd.DataFrame({"monto": ["10", "20", "30", "40"], "obs": ["", "", "", "12,5"]}).to_csv(ruta, index=False)
+    resultado = DataProcessor.procesar_por_bloques(str(ruta), str(salida), tamaño_bloque=3)
+    assert resultado["esquema"]["tipos"]["obs"] == "string"
+    assert pd.read_csv(salida, dtype=str)["obs"].tolist()[-1] == "12,5"
+
+
+def test_limpiar_columna_igual_a_limpiar_valor():
+    rng = np.random.default_rng(0)
+    alfabeto = list("0123456789,.-$% abcUF") + ["١", "é"]
+    textos = ["".join(rng.choice(alfabeto, rng.integers(0, 14))) for _ in range(5000)]
+    textos += ["x" * 200 + "12,5", "1.234.567,89", "-0,5", "", None]
+    serie = pd.Series(textos, dtype=object)
+    esperado = serie.map(DataProcessor.limpiar_valor, na_action="ignore")
+    resultado = DataProcessor.limpiar_columna(serie)
+    assert resultado.isna().equals(esperado.isna())
+    assert resultado.dropna().tolist() == esperado.dropna().tolist()
+
+
+def test_esquema_guardado_se_impone_con_estricto(tmp_path):
+    df = pd.DataFrame({"cantidad": ["1", "2", "3"], "precio": ["1,5", "2", "3,25"], "nota": ["a", "b", "c"]})
+    convertido, conversiones = DataProcessor.convertir_columnas(df)
+    ruta = tmp_path / "esquema.json"
+    DataProcessor.guardar_esquema(DataProcessor.crear_esquema(convertido, conversiones), str(ruta))
+    esquema = DataProcessor.cargar_esquema(str(ruta))
+    assert esquema["enteros"] == ["cantidad"] and esquema["decimales"] == ["precio"]
+
+    # Un bloque que por sí solo parecería de enteros sigue siendo de decimales
+    otro = pd.DataFrame({"cantidad": ["4"], "precio": ["7"], "nota": ["8"]})
+    resultado, _ = DataProcessor.convertir_columnas(otro, esquema, estricto=True)
+    assert {col: str(dtype) for col, dtype in resultado.dtypes.items()} == esquema["tipos"]
+    with pytest.raises(ValueError, match="cantidad"):
+        DataProcessor.convertir_columnas(otro.assign(cantidad=["sin dato"]), esquema, estricto=True)
+
+
+def test_deteccion_de_fechas(tmp_path):
+    serie = pd.Series(["31-01-2024", "01-02-2024", "15-03-2024"], name="f_detectar")
+    assert DataProcessor.detectar_formato_fecha(serie) == "%d-%m-%Y"
+    assert DataProcessor.convertir_fechas(serie).dt.month.tolist() == [1, 2, 3]
+    # Seriales de Excel solo si el nombre habla de fecha
+    seriales = pd.Series(["45000", "45001", "45002"])
+    assert DataProcessor.detectar_formato_fecha(seriales.rename("fechaPago")) == "excel"
+    assert DataProcessor.detectar_formato_fecha(seriales.rename("updated")) is None
+    # read_csv de pandas 3 deja el texto con dtype str
+    ruta = tmp_path / "fechas.csv"
+    pd.DataFrame({"f_csv": ["31-01-2024", "01-02-2024"]}).to_csv(ruta, index=False)
+    assert DataProcessor.inferir_tipo(pd.read_csv(ruta)["f_csv"]) == "fechas"
+
+
+def test_huella_filas_compara_numeros_por_valor():
+    grande = 2 ** 53
+    enteros = pd.DataFrame({"n": np.array([5, grande, grande + 1], dtype=np.int64), "t": [" A", "b", "c"]})
+    decimales = pd.DataFrame({"n": [5.0, float(grande), float(grande)], "t": ["a", "B ", "c"]})
+    huellas = DataProcessor.huella_filas(enteros)
+    assert (huellas[:2] == DataProcessor.huella_filas(decimales)[:2]).all()
+    # 2**53 + 1 no se redondea a 2**53
+    assert len(set(huellas.tolist())) == 3
+    nulos = pd.DataFrame({"n": pd.array([5, None, grande + 1], dtype="Int64"), "t": ["a", "b", "c"]})
+    assert DataProcessor.huella_filas(nulos)[2] == huellas[2]
+
+
+def test_diferencias_registros_con_indice_guardado(tmp_path):
+    anterior = pd.DataFrame({"id": [1, 2, 3, 3], "monto": [10, 20, 30, 30]})
+    ruta = str(tmp_path / "indice.npy")
+    DataProcessor.diferencias_registros(anterior, guardar=ruta)
+    nuevo = pd.DataFrame({"id": [1, 3, 4], "monto": [10.0, 30.0, 40.0]})
+    diferencias = DataProcessor.diferencias_registros(nuevo, ruta)
+    assert diferencias["iguales"]["id"].tolist() == [1, 3]
+    assert diferencias["nuevos"]["id"].tolist() == [4]
+    # Se eliminaron la fila 2 y una de las dos filas 3 repetidas
+    assert diferencias["eliminados"]["Fila"].tolist() == [1, 3]
+    desde_tabla = DataProcessor.diferencias_registros(nuevo, anterior)
+    assert desde_tabla["eliminados"].index.tolist() == [1, 3]
+
+
+def test_perfil_columnas_aproximado():
+    rng = np.random.default_rng(0)
+    tabla = pd.DataFrame({"a": rng.integers(0, 50_000, 200_000), "b": rng.integers(0, 100, 200_000)})
+    exacto = DataProcessor.perfil_columnas(tabla).set_index("Columna")
+    aproximado = DataProcessor.perfil_columnas(tabla, aproximado=True).set_index("Columna")
+    for columna in tabla.columns:
+        distintos = tabla[columna].nunique()
+        assert exacto.loc[columna, "Cantidad"] == distintos
+        assert abs(aproximado.loc[columna, "Cantidad"] - distintos) <= 0.03 * distintos
+    assert exacto.loc["b", "Suma"] == sum(range(100))
+    assert np.isnan(aproximado.loc["a", "Suma"])
+
+
+def test_flujo_igual_a_la_cadena_directa():
+    df = pd.DataFrame({"mi col": ["1", "2", ""], "otra.col": ["a", None, "c"], "sobra": ["x", "y", "z"]})
+    original = pd.DataFrame({"MI_COL": [1, 5], "OTRACOL": ["a", "e"]})
+    directo = DataProcessor.renombrar_columnas(df.copy())
+    directo = DataProcessor.rellenar_vacios(DataProcessor.convertir_columnas(directo)[0])
+    directo = directo[["MI_COL", "OTRACOL"]]
+    directo = DataProcessor.cruzar_registro(original, DataProcessor.añadir_key_and_indice(directo), huella=True)
+    diferido = (DataProcessor.flujo(df).renombrar_columnas().convertir_columnas().rellenar_vacios()
+                .seleccionar(["MI_COL", "OTRACOL"]).añadir_key_and_indice()
+                .cruzar_registro(original, huella=True))
+    assert [nombre for nombre, _ in diferido.optimizar()] == [
+        "renombrar_columnas", "rellenar_vacios", "seleccionar", "cruzar_registro"]
+    pd.testing.assert_frame_equal(diferido.ejecutar(), directo)
+    # La fila (1, "a") ya estaba en original
+    assert directo["MI_COL"].tolist() == [2, 0]
+
+
+def test_compactar_serie_y_bytes_ahorrados():
+    assert str(DataProcessor.compactar_serie(pd.Series([1, 100], dtype="Int64"), "enteros").dtype) == "Int8"
+    assert str(DataProcessor.compactar_serie(pd.Series([1, 1000], dtype="Int64"), "enteros").dtype) == "Int16"
+    assert str(DataProcessor.compactar_serie(pd.Series([1, 10 ** 6], dtype="Int64"), "enteros").dtype) == "Int32"
+    assert DataProcessor.compactar_serie(pd.Series([0.5, 1.25]), "decimales").dtype == np.float32
+    assert DataProcessor.compactar_serie(pd.Series([0.1, 1.25]), "decimales").dtype == np.float64
+    assert DataProcessor.compactar_serie(pd.Series(["a", "b"] * 10, dtype="string"), "texto").dtype == "category"
+
+    df = pd.DataFrame({"n": [str(i % 100) for i in range(1000)], "t": ["uno", "dos"] * 500})
+    compacto, conversiones = DataProcessor.convertir_columnas(df, compacto=True)
+    assert str(compacto["n"].dtype) == "Int8" and compacto["t"].dtype == "category"
+    normal, _ = DataProcessor.convertir_columnas(df)
+    for columna in df.columns:
+        ahorro = normal[columna].memory_usage(index=False, deep=True) - compacto[columna].memory_usage(index=False, deep=True)
+        assert conversiones["bytes_ahorrados"][columna] == ahorro > 0